@@ -0,0 +1,50 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json results.json --threshold 0.2
+
+Exits with status 1 when any benchmark's p50 (or mean, for one-shot runs)
+got slower by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+from typing import Any
+
+
+def _index(report: dict[str, Any]) -> dict[tuple[int, str, str], float]:
+    return {
+        (row["size"], row["benchmark"], row["case"]): row.get("p50_ms", row["mean_ms"])
+        for row in report["results"]
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, as a fraction")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = _index(json.load(f))
+    with open(args.current, encoding="utf-8") as f:
+        current = _index(json.load(f))
+
+    regressions = 0
+    print(f"{'size':>9}  {'benchmark':<20} {'case':<24} {'before':>10} {'after':>10} {'change':>8}")
+    for key in sorted(baseline.keys() & current.keys()):
+        before, after = baseline[key], current[key]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        size, benchmark, case = key
+        print(f"{size:>9}  {benchmark:<20} {case:<24} {before:>10.3f} {after:>10.3f} {change:>+8.1%}{flag}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
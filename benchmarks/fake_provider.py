@@ -0,0 +1,118 @@
+"""
+Local stand-in for an OpenAI-compatible provider, for benchmarks.
+
+Serves /v1/chat/completions (plain and `stream: true`) and /v1/embeddings
+with deterministic responses after a configurable delay, so AI code paths
+can be timed without network noise or API costs.
+
+    python -m benchmarks.fake_provider --port 8999 --latency-ms 200
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+EMBEDDING_DIM = 64
+
+# One reply that satisfies every parser in ai_service (NL parsing, tag
+# suggestions, summaries).
+_REPLY = {
+    "title": "Benchmark task",
+    "description": "Created by the fake provider.",
+    "priority": "medium",
+    "tags": ["bench"],
+    "summary": "A steady mix of routine work and a few urgent items.",
+}
+
+
+def create_app(latency_ms: float = 0.0, per_token_ms: float = 0.0) -> FastAPI:
+    """
+    Build the fake provider. Each request waits `latency_ms`; streamed
+    completions additionally wait `per_token_ms` between chunks.
+    """
+    app = FastAPI(title="Fake LLM provider")
+    app.state.requests = 0
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):  # noqa: ANN202
+        body = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(latency_ms / 1000)
+        prompt = body["messages"][-1]["content"]
+        content = json.dumps(_REPLY)
+        usage = {"prompt_tokens": len(prompt) // 4 + 1, "completion_tokens": len(content) // 4 + 1}
+        if not body.get("stream"):
+            return {"choices": [{"message": {"role": "assistant", "content": content}}], "usage": usage}
+
+        async def events():  # noqa: ANN202
+            for word in _REPLY["summary"].split(" "):
+                await asyncio.sleep(per_token_ms / 1000)
+                chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request) -> JSONResponse:
+        body = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(latency_ms / 1000)
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        data = [{"index": i, "embedding": fake_embedding(text)} for i, text in enumerate(inputs)]
+        tokens = sum(len(text) // 4 + 1 for text in inputs)
+        return JSONResponse({"data": data, "usage": {"prompt_tokens": tokens}})
+
+    return app
+
+
+def fake_embedding(text: str) -> list[float]:
+    """Deterministic pseudo-random unit-ish vector derived from the text."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    raw = (digest * (EMBEDDING_DIM // len(digest) + 1))[:EMBEDDING_DIM]
+    return [(b - 127.5) / 127.5 for b in raw]
+
+
+class FakeProviderServer:
+    """Run the fake provider with uvicorn on a background thread."""
+
+    def __init__(self, port: int = 8999, latency_ms: float = 0.0, per_token_ms: float = 0.0) -> None:
+        self.port = port
+        self.app = create_app(latency_ms, per_token_ms)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def __enter__(self) -> "FakeProviderServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Fake provider did not start.")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--per-token-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms, args.per_token_ms), host="127.0.0.1", port=args.port)
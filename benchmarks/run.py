@@ -0,0 +1,292 @@
+"""
+Benchmark suite for the task API and AI paths.
+
+Seeds one database up to each requested size (10k, 100k, 1M tasks by
+default) and, at every size, times:
+
+- list_tasks for each filter combination (and offset vs. keyset paging)
+- CRUD throughput through the HTTP API
+- semantic / lexical / hybrid search
+- summarize_tasks, cold and with warm chunk caches
+
+AI paths talk to a local fake provider (see fake_provider.py) with a
+configurable latency. Results are written as JSON; compare two runs with
+`python -m benchmarks.compare`.
+
+    python -m benchmarks.run --sizes 10000 100000 --latency-ms 50 --output results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Any
+
+from benchmarks.fake_provider import FakeProviderServer
+
+
+STATUSES = ["pending", "in_progress", "completed"]
+PRIORITIES = ["low", "medium", "high"]
+TAGS = [f"tag-{i}" for i in range(50)]
+WORDS = "review deploy write fix plan call email update test design refactor migrate report budget invoice".split()
+
+# name -> TaskQueryParams kwargs
+LIST_CASES: dict[str, dict[str, Any]] = {
+    "no_filter": {},
+    "status": {"status": "pending"},
+    "priority": {"priority": "high"},
+    "tag": {"tag": "tag-7"},
+    "status+priority": {"status": "pending", "priority": "high"},
+    "status+priority+tag": {"status": "pending", "priority": "high", "tag": "tag-7"},
+    "tags_all": {"tags": "tag-1,tag-2", "tag_mode": "all"},
+    "tags_any": {"tags": "tag-1,tag-2", "tag_mode": "any"},
+    "search": {"search": "review budget"},
+    "descending": {"descending": True},
+}
+
+
+def timed(fn: Callable[[], Any], iterations: int, warmup: int = 2) -> dict[str, float]:
+    """Run `fn` warmup + iterations times; latency stats (ms) over the timed runs."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 3),
+        "min_ms": round(samples[0], 3),
+        "ops_per_sec": round(1000 / statistics.fmean(samples), 1) if samples[0] > 0 else None,
+    }
+
+
+def seed(db: Any, target: int, rng: random.Random, chunk_size: int = 10_000) -> float:
+    """Insert synthetic tasks until the table holds `target` rows; returns seconds spent."""
+    from sqlalchemy import func, insert, select
+
+    from src.models.task import Task, TaskTag
+
+    start = time.perf_counter()
+    count = db.execute(select(func.count()).select_from(Task)).scalar_one()
+    next_id = (db.execute(select(func.max(Task.id))).scalar() or 0) + 1
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    while count < target:
+        n = min(chunk_size, target - count)
+        tasks, tags = [], []
+        for task_id in range(next_id, next_id + n):
+            task_tags = rng.sample(TAGS, rng.randint(0, 3))
+            title = " ".join(rng.choices(WORDS, k=3))
+            tasks.append(
+                {
+                    "id": task_id,
+                    "title": f"{title} {task_id}",
+                    "description": " ".join(rng.choices(WORDS, k=12)),
+                    "status": rng.choice(STATUSES),
+                    "priority": rng.choice(PRIORITIES),
+                    "tags": task_tags,
+                    "created_at": base + timedelta(seconds=task_id),
+                    "updated_at": base + timedelta(seconds=task_id),
+                }
+            )
+            tags.extend({"task_id": task_id, "tag": tag} for tag in task_tags)
+        db.execute(insert(Task), tasks)
+        if tags:
+            db.execute(insert(TaskTag), tags)
+        db.commit()
+        count += n
+        next_id += n
+    return time.perf_counter() - start
+
+
+def bench_list_tasks(db: Any, iterations: int) -> list[dict[str, Any]]:
+    from sqlalchemy import func, select
+
+    from src.models.schemas import TaskQueryParams
+    from src.models.task import Task
+    from src.services import task_service
+
+    results = []
+    for case, kwargs in LIST_CASES.items():
+        params = TaskQueryParams(limit=50, **kwargs)
+        results.append({"benchmark": "list_tasks", "case": case, **timed(lambda: task_service.list_tasks(db, params), iterations)})
+
+    # Deep pagination: offset scans past every skipped row, keyset seeks.
+    total = db.execute(select(func.count()).select_from(Task)).scalar_one()
+    deep = TaskQueryParams(limit=50, offset=total // 2)
+    results.append({"benchmark": "list_tasks", "case": "offset_middle", **timed(lambda: task_service.list_tasks(db, deep), iterations)})
+    middle = task_service.list_tasks(db, deep)
+    if middle:
+        cursor = TaskQueryParams(limit=50, cursor=task_service.encode_cursor(middle[0], descending=False))
+        results.append({"benchmark": "list_tasks", "case": "cursor_middle", **timed(lambda: task_service.list_tasks(db, cursor), iterations)})
+    return results
+
+
+def bench_crud(http: Any, operations: int) -> list[dict[str, Any]]:
+    ids: list[int] = []
+
+    def create() -> None:
+        r = http.post("/api/tasks", json={"title": "bench crud", "description": "timed", "tags": ["tag-1"]})
+        ids.append(r.json()["id"])
+
+    results = [{"benchmark": "crud", "case": "create", **timed(create, operations, warmup=0)}]
+    reads, updates, deletes = iter(ids), iter(ids), iter(list(ids))
+    results.append({"benchmark": "crud", "case": "get", **timed(lambda: http.get(f"/api/tasks/{next(reads)}"), operations, warmup=0)})
+    results.append(
+        {
+            "benchmark": "crud",
+            "case": "update",
+            **timed(lambda: http.patch(f"/api/tasks/{next(updates)}", json={"status": "completed"}), operations, warmup=0),
+        }
+    )
+    results.append({"benchmark": "crud", "case": "delete", **timed(lambda: http.delete(f"/api/tasks/{next(deletes)}"), operations, warmup=0)})
+    return results
+
+
+def bench_search(db: Any, llm: Any, embed_limit: int, iterations: int) -> list[dict[str, Any]]:
+    from src.models.schemas import SearchMode, TaskSearchRequest
+    from src.services import embedding_service, search_service
+
+    start = time.perf_counter()
+    embedded = embedding_service.backfill_missing_embeddings(db, llm, limit=embed_limit)
+    results = [
+        {
+            "benchmark": "embedding_backfill",
+            "case": f"{embedded}_tasks",
+            "iterations": 1,
+            "mean_ms": round((time.perf_counter() - start) * 1000, 3),
+        }
+    ]
+    for mode in SearchMode:
+        req = TaskSearchRequest(query="review the budget report", mode=mode, limit=10)
+        results.append(
+            {"benchmark": "semantic_search", "case": mode.value, **timed(lambda: search_service.semantic_search(db, req, llm), iterations)}
+        )
+    filtered = TaskSearchRequest(query="review the budget report", status="pending", tag="tag-7", limit=10)
+    results.append(
+        {"benchmark": "semantic_search", "case": "semantic+filters", **timed(lambda: search_service.semantic_search(db, filtered, llm), iterations)}
+    )
+    return results
+
+
+def bench_summarize(db: Any, llm: Any, task_count: int, iterations: int) -> list[dict[str, Any]]:
+    from src.services import ai_service, task_service
+
+    tasks = list(islice(task_service.iter_tasks(db), task_count))
+    # One loop for every run: the client's async connection pool is bound to it.
+    loop = asyncio.new_event_loop()
+    run = lambda: loop.run_until_complete(ai_service.asummarize_tasks(tasks, llm))  # noqa: E731
+    try:
+        ai_service._chunk_summaries.clear()
+        results = [{"benchmark": "summarize_tasks", "case": f"cold_{len(tasks)}_tasks", **timed(run, 1, warmup=0)}]
+        results.append({"benchmark": "summarize_tasks", "case": f"warm_{len(tasks)}_tasks", **timed(run, iterations, warmup=0)})
+    finally:
+        loop.run_until_complete(llm.aclose())
+        loop.close()
+    return results
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="task-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    with FakeProviderServer(port=args.port, latency_ms=args.latency_ms) as provider:
+        os.environ.update(
+            {
+                "DATABASE_URL": database_url,
+                "LLM_PROVIDER": "openai",
+                "LLM_API_KEY": "bench",
+                "LLM_BASE_URL": provider.base_url,
+                "LLM_HTTP2": "false",
+                # Measure the provider path, not the response cache or limiter.
+                "LLM_CACHE_ENABLED": "false",
+                "LLM_RPM": "0",
+                "LLM_TPM": "0",
+                # Embeddings are created up front by bench_search, not by the startup job.
+                "EMBEDDING_BACKFILL_LIMIT": "0",
+            }
+        )
+        # Settings are read at import time, so src is imported only now.
+        from fastapi.testclient import TestClient
+
+        from src.main import app
+        from src.utils.db import SessionLocal, init_db
+        from src.utils.llm_client import get_llm_client
+
+        init_db()
+        rng = random.Random(args.seed)
+        results: list[dict[str, Any]] = []
+        with TestClient(app) as http, SessionLocal() as db:
+            llm = get_llm_client()
+            for size in sorted(args.sizes):
+                print(f"[bench] seeding to {size} tasks", file=sys.stderr)
+                seconds = seed(db, size, rng)
+                rows = [{"benchmark": "seed", "case": "insert", "iterations": 1, "mean_ms": round(seconds * 1000, 3)}]
+                print(f"[bench] running suite at {size} tasks", file=sys.stderr)
+                rows += bench_list_tasks(db, args.iterations)
+                rows += bench_crud(http, args.crud_operations)
+                rows += bench_search(db, llm, args.embed_limit, args.iterations)
+                rows += bench_summarize(db, llm, args.summary_tasks, args.iterations)
+                results.extend({"size": size, **row} for row in rows)
+                db.expunge_all()
+            provider_requests = provider.app.state.requests
+
+    return {"meta": _meta(args, database_url, provider_requests), "results": results}
+
+
+def _meta(args: argparse.Namespace, database_url: str, provider_requests: int) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "database": database_url.split(":", 1)[0],
+        "provider_requests": provider_requests,
+        "args": {k: v for k, v in vars(args).items() if k != "output"},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--iterations", type=int, default=20, help="timed runs per read benchmark")
+    parser.add_argument("--crud-operations", type=int, default=200)
+    parser.add_argument("--embed-limit", type=int, default=10_000, help="tasks to embed before search benchmarks")
+    parser.add_argument("--summary-tasks", type=int, default=1_000)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake provider latency per request")
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--database-url", help="benchmark another database (e.g. Postgres) instead of a temp SQLite file")
+    parser.add_argument("--output", default="-", help="JSON output path, or - for stdout")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,97 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./data/tasks.db"
     environment: str = "dev"
+    # Postgres connection pool. Connections are recycled rather than pinged on
+    # every checkout; DB_PREPARE_THRESHOLD applies to the psycopg (v3) driver.
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = False
+    db_prepare_threshold: int = 5
+    # Serve the CRUD routes from the async stack (AsyncSession on aiosqlite /
+    # asyncpg) instead of sync sessions in the threadpool. ASYNC_DATABASE_URL
+    # defaults to DATABASE_URL with the async driver swapped in.
+    db_async: bool = False
+    async_database_url: str | None = None
+    # SQLite connection pragmas (file databases only).
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456
+    sqlite_cache_size_kib: int = 65536
     llm_provider: str = "openai"  # e.g. 'openai', 'anthropic', 'stub'
     # IMPORTANT: Do NOT hard-code real API keys here. Set LLM_API_KEY in your .env instead.
     llm_api_key: str | None = None
+    # Optional OpenAI-compatible base URL (e.g. http://localhost:8000/v1)
+    # replacing the provider's default endpoints.
+    llm_base_url: str | None = None
+    # Shared HTTP pool used for all provider calls.
+    llm_http2: bool = True
+    llm_max_connections: int = 20
+    llm_timeout_seconds: float = 15.0
+    # Provider resilience: request/token budgets per minute (0 = unlimited),
+    # retries with jittered exponential backoff on 429/5xx, and the circuit
+    # breaker that pauses calls after repeated failures.
+    llm_rpm: int = 500
+    llm_tpm: int = 200000
+    llm_max_retries: int = 3
+    llm_backoff_base_seconds: float = 0.5
+    llm_backoff_max_seconds: float = 8.0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_reset_seconds: float = 30.0
+    # Dimension of the offline hashing embedder used when no embeddings
+    # provider is configured.
+    local_embedding_dim: int = 256
+    # Response cache for generate()/embed(); set LLM_CACHE_PATH to also keep
+    # entries in an on-disk SQLite file.
+    llm_cache_enabled: bool = True
+    llm_cache_max_entries: int = 2048
+    llm_cache_ttl_seconds: float = 3600.0
+    llm_cache_path: str | None = None
+    # Cache of serialized GET /tasks and GET /tasks/{id} responses.
+    # TASK_CACHE_PATH shares entries and invalidations between worker
+    # processes through an on-disk SQLite file; unless TASK_CACHE_ENABLED is
+    # set, the cache is on only then (a per-process cache would miss other
+    # workers' writes).
+    task_cache_enabled: bool | None = None
+    task_cache_max_entries: int = 4096
+    task_cache_ttl_seconds: float = 300.0
+    task_cache_path: str | None = None
+    # Bulk endpoints: rows per INSERT/UPDATE batch, and whether each batch
+    # gets its own transaction instead of one for the whole request.
+    bulk_chunk_size: int = 500
+    bulk_commit_per_chunk: bool = False
+    # Max concurrent LLM parse calls for POST /tasks/natural-language/batch.
+    nl_batch_concurrency: int = 8
+    # Summaries: prompt token budget per chunk, ids per chunk (tasks are
+    # chunked by fixed id ranges), concurrent chunk calls, how many chunk
+    # summaries to keep cached, and the most tasks one summary request may
+    # cover (larger requests are rejected with 400).
+    summary_chunk_tokens: int = 3000
+    summary_chunk_size: int = 50
+    summary_concurrency: int = 4
+    summary_cache_max_entries: int = 1024
+    summary_max_tasks: int = 5000
+    # Background jobs (?async_mode=true on AI routes): worker count, and max
+    # jobs calling the same LLM provider at once.
+    job_workers: int = 4
+    job_provider_concurrency: int = 2
+    # Max job ids waiting in memory (0 = unbounded); async requests get a 503
+    # while it is full. Running jobs renew a lease every
+    # JOB_HEARTBEAT_SECONDS; one not renewed for JOB_LEASE_SECONDS is requeued.
+    job_queue_max_size: int = 1000
+    job_lease_seconds: float = 60.0
+    job_heartbeat_seconds: float = 10.0
+    # Max tasks embedded by the background backfill job, queued at startup
+    # and every EMBEDDING_BACKFILL_INTERVAL_SECONDS after (0 = startup only)
+    # when some task has no stored vector (a limit of 0 disables it).
+    embedding_backfill_limit: int = 10000
+    embedding_backfill_interval_seconds: float = 300.0
+    # Hybrid search: candidates taken from each channel before fusion, and the
+    # reciprocal rank fusion constant.
+    search_candidates_per_channel: int = 100
+    search_rrf_k: int = 60
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -1,10 +1,26 @@
+import asyncio
+import itertools
+import json
+from collections.abc import AsyncIterator, Iterator
 from typing import Optional
 
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTasks
+from starlette.concurrency import run_in_threadpool
 
+from src.config import settings
 from src.models.schemas import (
+    BulkItemResult,
+    BulkResponse,
+    NaturalLanguageBatchRequest,
     NaturalLanguageTaskRequest,
     TagSuggestionRequest,
+    TaskBulkCreateRequest,
+    TaskBulkDeleteRequest,
+    TaskBulkUpdateItem,
+    TaskBulkUpdateRequest,
     TaskCreate,
     TaskQueryParams,
     TaskRead,
@@ -12,54 +28,380 @@ from src.models.schemas import (
     TaskSummaryRequest,
     TaskUpdate,
 )
-from src.services import ai_service, task_service
+from src.models.task import Task, TaskPriority, TaskStatus
+from src.services import ai_service, embedding_service, job_service, search_service, task_service
+from src.services.task_cache import ListPage, task_cache
+from src.utils.db import ReadSessionLocal, SessionLocal, get_async_sessionmaker
 from src.utils.llm_client import LLMClient
 
 
-def create_task(db: Session, payload: TaskCreate) -> TaskRead:
+def create_task(
+    db: Session,
+    payload: TaskCreate,
+    client: LLMClient,
+    background: Optional[BackgroundTasks] = None,
+) -> TaskRead:
+    """
+    Insert a task and embed it. With `background`, the provider call runs
+    after the response is sent instead of holding up the request.
+    """
     task = task_service.create_task(db, payload)
+    if background is not None:
+        background.add_task(_embed_task, task.id, client)
+    else:
+        embedding_service.sync_task_embedding(db, task, client)
     return TaskRead.model_validate(task)
 
 
-def list_tasks(db: Session, params: TaskQueryParams) -> list[TaskRead]:
-    tasks = task_service.list_tasks(db, params)
-    return [TaskRead.model_validate(t) for t in tasks]
+def _embed_task(task_id: int, client: LLMClient) -> None:
+    # Runs after the response; the request-scoped session is closed by then.
+    with SessionLocal() as db:
+        task = task_service.get_task(db, task_id)
+        if task is not None:
+            embedding_service.sync_task_embedding(db, task, client)
+
+
+_TASK_LIST = TypeAdapter(list[TaskRead])
+
+
+def list_tasks(db: Session, params: TaskQueryParams) -> ListPage:
+    """
+    Return one page of tasks as a JSON array, and the cursor for the next
+    page (None on the last page). Pages are served from task_cache.
+    """
+    return task_cache.list_tasks(params.model_dump(mode="json"), lambda: _page(task_service.list_tasks(db, params), params))
+
+
+def _page(tasks: list[Task], params: TaskQueryParams) -> ListPage:
+    next_cursor = None
+    if tasks and len(tasks) == params.limit and not params.search:
+        next_cursor = task_service.encode_cursor(tasks[-1], params.descending)
+    return _TASK_LIST.dump_json([TaskRead.model_validate(t) for t in tasks]).decode(), next_cursor
+
+
+def _task_json(task: Optional[Task]) -> Optional[str]:
+    return TaskRead.model_validate(task).model_dump_json() if task else None
 
 
-def get_task(db: Session, task_id: int) -> Optional[TaskRead]:
-    task = task_service.get_task(db, task_id)
-    return TaskRead.model_validate(task) if task else None
+def export_tasks(
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    tag: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Yield matching tasks as NDJSON lines, reading the table in batches.
 
+    Opens its own session: the request-scoped one is closed before a
+    streaming response body is consumed.
+    """
+    with ReadSessionLocal() as db:
+        for task in task_service.iter_tasks(db, status, priority, tag):
+            yield TaskRead.model_validate(task).model_dump_json() + "\n"
 
-def update_task(db: Session, task_id: int, payload: TaskUpdate) -> Optional[TaskRead]:
+
+def get_task(db: Session, task_id: int) -> Optional[str]:
+    """The task as JSON (None if missing), served from task_cache."""
+    return task_cache.get_task(task_id, lambda: _task_json(task_service.get_task(db, task_id)))
+
+
+def update_task(
+    db: Session,
+    task_id: int,
+    payload: TaskUpdate,
+    client: LLMClient,
+    background: Optional[BackgroundTasks] = None,
+) -> Optional[TaskRead]:
     task = task_service.update_task(db, task_id, payload)
-    return TaskRead.model_validate(task) if task else None
+    if not task:
+        return None
+    if payload.model_fields_set & embedding_service.EMBEDDED_FIELDS:
+        if background is not None:
+            background.add_task(_embed_task, task_id, client)
+        else:
+            embedding_service.sync_task_embedding(db, task, client)
+    return TaskRead.model_validate(task)
 
 
 def delete_task(db: Session, task_id: int) -> bool:
-    return task_service.delete_task(db, task_id)
+    deleted = task_service.delete_task(db, task_id)
+    if deleted:
+        embedding_service.forget_task(task_id)
+    return deleted
+
+
+async def acreate_task(
+    db: AsyncSession,
+    payload: TaskCreate,
+    client: LLMClient,
+    background: Optional[BackgroundTasks] = None,
+) -> TaskRead:
+    task = await task_service.acreate_task(db, payload)
+    if background is not None:
+        background.add_task(_aembed_task, task.id, client)
+    else:
+        await embedding_service.async_task_embedding(db, task, client)
+    return TaskRead.model_validate(task)
+
 
+async def _aembed_task(task_id: int, client: LLMClient) -> None:
+    async with get_async_sessionmaker()() as db:
+        task = await task_service.aget_task(db, task_id)
+        if task is not None:
+            await embedding_service.async_task_embedding(db, task, client)
 
-def create_task_from_nl(db: Session, req: NaturalLanguageTaskRequest, client: LLMClient) -> TaskRead:
-    parsed = ai_service.parse_natural_language_task(req.text, client)
-    task = task_service.create_task(db, TaskCreate(**parsed))
+
+async def alist_tasks(db: AsyncSession, params: TaskQueryParams) -> ListPage:
+    async def load() -> ListPage:
+        return _page(await task_service.alist_tasks(db, params), params)
+
+    return await task_cache.alist_tasks(params.model_dump(mode="json"), load)
+
+
+async def aget_task(db: AsyncSession, task_id: int) -> Optional[str]:
+    async def load() -> Optional[str]:
+        return _task_json(await task_service.aget_task(db, task_id))
+
+    return await task_cache.aget_task(task_id, load)
+
+
+async def aupdate_task(
+    db: AsyncSession,
+    task_id: int,
+    payload: TaskUpdate,
+    client: LLMClient,
+    background: Optional[BackgroundTasks] = None,
+) -> Optional[TaskRead]:
+    task = await task_service.aupdate_task(db, task_id, payload)
+    if not task:
+        return None
+    if payload.model_fields_set & embedding_service.EMBEDDED_FIELDS:
+        if background is not None:
+            background.add_task(_aembed_task, task_id, client)
+        else:
+            await embedding_service.async_task_embedding(db, task, client)
     return TaskRead.model_validate(task)
 
 
-def suggest_tags(db: Session, task_id: int, req: TagSuggestionRequest, client: LLMClient) -> dict:
-    task = task_service.get_task(db, task_id)
-    return ai_service.suggest_tags_and_priority(task, req, client)
+async def adelete_task(db: AsyncSession, task_id: int) -> bool:
+    deleted = await task_service.adelete_task(db, task_id)
+    if deleted:
+        embedding_service.forget_task(task_id)
+    return deleted
+
+
+def bulk_create_tasks(
+    db: Session,
+    req: TaskBulkCreateRequest,
+    client: LLMClient,
+    background: Optional[BackgroundTasks] = None,
+) -> BulkResponse:
+    results: list[BulkItemResult] = []
+    valid: list[tuple[int, TaskCreate]] = []
+    for index, item in enumerate(req.items):
+        try:
+            valid.append((index, TaskCreate.model_validate(item)))
+        except ValidationError as exc:
+            results.append(BulkItemResult(index=index, ok=False, error=_validation_message(exc)))
+
+    results.extend(_insert_many(db, valid, client, background))
+    return _bulk_response(results)
+
+
+def _insert_many(
+    db: Session,
+    valid: list[tuple[int, TaskCreate]],
+    client: LLMClient,
+    background: Optional[BackgroundTasks] = None,
+) -> list[BulkItemResult]:
+    tasks = task_service.bulk_create_tasks(
+        db,
+        [payload for _, payload in valid],
+        chunk_size=settings.bulk_chunk_size,
+        commit_per_chunk=settings.bulk_commit_per_chunk,
+    )
+    _embed_tasks_or_defer(db, tasks, client, background)
+    return [BulkItemResult(index=index, id=task.id, ok=True) for (index, _), task in zip(valid, tasks)]
+
+
+def bulk_update_tasks(
+    db: Session,
+    req: TaskBulkUpdateRequest,
+    client: LLMClient,
+    background: Optional[BackgroundTasks] = None,
+) -> BulkResponse:
+    results: list[BulkItemResult] = []
+    valid: list[tuple[int, int, TaskUpdate]] = []
+    for index, item in enumerate(req.items):
+        try:
+            parsed = TaskBulkUpdateItem.model_validate(item)
+        except ValidationError as exc:
+            results.append(BulkItemResult(index=index, id=item.get("id"), ok=False, error=_validation_message(exc)))
+            continue
+        payload = TaskUpdate.model_validate(parsed.model_dump(exclude_unset=True, exclude={"id"}))
+        valid.append((index, parsed.id, payload))
+
+    updated = task_service.bulk_update_tasks(
+        db,
+        [(task_id, payload) for _, task_id, payload in valid],
+        chunk_size=settings.bulk_chunk_size,
+        commit_per_chunk=settings.bulk_commit_per_chunk,
+    )
+    reembed = [
+        updated[task_id]
+        for _, task_id, payload in valid
+        if task_id in updated and payload.model_fields_set & embedding_service.EMBEDDED_FIELDS
+    ]
+    _embed_tasks_or_defer(db, reembed, client, background)
+
+    for index, task_id, _ in valid:
+        if task_id in updated:
+            results.append(BulkItemResult(index=index, id=task_id, ok=True))
+        else:
+            results.append(BulkItemResult(index=index, id=task_id, ok=False, error="Task not found"))
+    return _bulk_response(results)
+
+
+def _embed_tasks_or_defer(db: Session, tasks: list[Task], client: LLMClient, background: Optional[BackgroundTasks]) -> None:
+    if background is None:
+        embedding_service.ensure_task_embeddings(db, tasks, client)
+    elif tasks:
+        background.add_task(_embed_tasks, [task.id for task in tasks], client)
 
 
-def summarize_tasks(db: Session, req: TaskSummaryRequest, client: LLMClient) -> dict:
+def _embed_tasks(task_ids: list[int], client: LLMClient) -> None:
+    with SessionLocal() as db:
+        embedding_service.ensure_task_embeddings(db, task_service.get_tasks_by_ids(db, task_ids), client)
+
+
+def bulk_delete_tasks(db: Session, req: TaskBulkDeleteRequest) -> BulkResponse:
+    deleted = task_service.bulk_delete_tasks(
+        db,
+        req.ids,
+        chunk_size=settings.bulk_chunk_size,
+        commit_per_chunk=settings.bulk_commit_per_chunk,
+    )
+    for task_id in deleted:
+        embedding_service.forget_task(task_id)
+    results = [
+        BulkItemResult(index=index, id=task_id, ok=task_id in deleted, error=None if task_id in deleted else "Task not found")
+        for index, task_id in enumerate(req.ids)
+    ]
+    return _bulk_response(results)
+
+
+def _bulk_response(results: list[BulkItemResult]) -> BulkResponse:
+    results.sort(key=lambda r: r.index)
+    succeeded = sum(1 for r in results if r.ok)
+    return BulkResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors())
+
+
+async def create_task_from_nl(db: Session, req: NaturalLanguageTaskRequest, client: LLMClient) -> TaskRead:
+    parsed = await ai_service.aparse_natural_language_task(req.text, client)
+    return await run_in_threadpool(create_task, db, TaskCreate(**parsed), client)
+
+
+async def create_tasks_from_nl_batch(db: Session, req: NaturalLanguageBatchRequest, client: LLMClient) -> BulkResponse:
+    """
+    Parse many texts concurrently (at most NL_BATCH_CONCURRENCY provider
+    calls in flight), then insert every task that parsed in one batch.
+    """
+    semaphore = asyncio.Semaphore(settings.nl_batch_concurrency)
+
+    async def _parse(text: str) -> dict:
+        item = NaturalLanguageTaskRequest(text=text)
+        async with semaphore:
+            return await ai_service.aparse_natural_language_task(item.text, client)
+
+    outcomes = await asyncio.gather(*(_parse(text) for text in req.texts), return_exceptions=True)
+
+    results: list[BulkItemResult] = []
+    valid: list[tuple[int, TaskCreate]] = []
+    for index, outcome in enumerate(outcomes):
+        if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+            # CancelledError (or KeyboardInterrupt) stops the whole batch, not one item.
+            raise outcome
+        if isinstance(outcome, ValidationError):
+            results.append(BulkItemResult(index=index, ok=False, error=_validation_message(outcome)))
+        elif isinstance(outcome, Exception):
+            results.append(BulkItemResult(index=index, ok=False, error=str(outcome)))
+        else:
+            try:
+                valid.append((index, TaskCreate(**outcome)))
+            except ValidationError as exc:
+                # The parser does not enforce every field limit (e.g. title length).
+                results.append(BulkItemResult(index=index, ok=False, error=_validation_message(exc)))
+
+    results.extend(await run_in_threadpool(_insert_many, db, valid, client))
+    return _bulk_response(results)
+
+
+async def suggest_tags(db: Session, task_id: int, req: TagSuggestionRequest, client: LLMClient) -> dict:
+    task = await run_in_threadpool(task_service.get_task, db, task_id)
+    return await ai_service.asuggest_tags_and_priority(task, req, client)
+
+
+async def summarize_tasks(db: Session, req: TaskSummaryRequest, client: LLMClient) -> dict:
+    tasks = await run_in_threadpool(_load_summary_tasks, db, req)
+    return await ai_service.asummarize_tasks(tasks, client)
+
+
+async def stream_summary(db: Session, req: TaskSummaryRequest, client: LLMClient) -> AsyncIterator[str]:
+    """
+    Load the tasks now, while the request's session is open, and return the
+    summary as a stream of server-sent events: `data` events carrying text
+    deltas, then one `done` event.
+    """
+    tasks = await run_in_threadpool(_load_summary_tasks, db, req)
+    return _summary_events(tasks, client)
+
+
+async def _summary_events(tasks: list[Task], client: LLMClient) -> AsyncIterator[str]:
+    async for delta in ai_service.astream_summary(tasks, client):
+        yield f"data: {json.dumps({'delta': delta})}\n\n"
+    yield f"event: done\ndata: {json.dumps({'count': len(tasks), 'provider': client.info()})}\n\n"
+
+
+def _load_summary_tasks(db: Session, req: TaskSummaryRequest) -> list[Task]:
+    """
+    The tasks to summarize: `req.task_ids`, or every task. Raises ValueError
+    past SUMMARY_MAX_TASKS instead of loading an unbounded table into memory.
+    """
+    limit = settings.summary_max_tasks
+    too_many = f"Too many tasks to summarize (max {limit}); pass task_ids to pick a subset."
     if req.task_ids:
-        tasks = [task_service.get_task(db, tid) for tid in req.task_ids]
-        tasks = [t for t in tasks if t is not None]
-    else:
-        tasks = task_service.list_tasks(db, TaskQueryParams(limit=100))
-    return ai_service.summarize_tasks(tasks, client)
+        if len(req.task_ids) > limit:
+            raise ValueError(too_many)
+        return task_service.get_tasks_by_ids(db, req.task_ids)
+    tasks = list(itertools.islice(task_service.iter_tasks(db), limit + 1))
+    if len(tasks) > limit:
+        raise ValueError(too_many)
+    return tasks
+
+
+async def semantic_search(db: Session, req: TaskSearchRequest, client: LLMClient) -> dict:
+    return await search_service.asemantic_search(db, req, client)
+
+
+# Background job kinds (?async_mode=true on the AI routes), run by
+# job_service's workers with the payload the route enqueued.
+
+
+async def _natural_language_job(db: Session, payload: dict, client: LLMClient) -> TaskRead:
+    return await create_task_from_nl(db, NaturalLanguageTaskRequest.model_validate(payload), client)
+
+
+async def _tag_suggestion_job(db: Session, payload: dict, client: LLMClient) -> dict:
+    return await suggest_tags(db, payload["task_id"], TagSuggestionRequest.model_validate(payload["request"]), client)
+
+
+async def _summary_job(db: Session, payload: dict, client: LLMClient) -> dict:
+    return await summarize_tasks(db, TaskSummaryRequest.model_validate(payload), client)
 
 
-def semantic_search(db: Session, req: TaskSearchRequest, client: LLMClient) -> dict:
-    tasks = task_service.list_tasks(db, TaskQueryParams(limit=req.limit))
-    return ai_service.semantic_search(req.query, tasks, client, limit=req.limit)
+job_service.register_handler("natural_language", _natural_language_job)
+job_service.register_handler("tag_suggestion", _tag_suggestion_job)
+job_service.register_handler("summary", _summary_job)
@@ -1,21 +1,43 @@
-from fastapi import Depends, FastAPI
+import asyncio
+
+from fastapi import FastAPI, Response
 
 from src.config import settings
+from src.routes.async_task_routes import router as async_task_crud_router
+from src.routes.job_routes import router as job_router
+from src.routes.task_routes import crud_router as task_crud_router
 from src.routes.task_routes import router as task_router
-from src.utils.db import init_db
-from src.utils.llm_client import LLMClient
+from src.services.job_service import job_queue, run_embedding_backfills
+from src.utils.db import dispose_async_engine, init_db
+from src.utils.llm_client import close_llm_client, get_llm_client
+from src.utils.metrics import REGISTRY, MetricsMiddleware
 
 
 app = FastAPI(title="AI-LLM Task Manager", version="0.1.0")
+app.add_middleware(MetricsMiddleware)
 
-
-def get_llm_client() -> LLMClient:
-    return LLMClient(provider=settings.llm_provider, api_key=settings.llm_api_key)
+# Long-running startup tasks, cancelled on shutdown.
+_background: list[asyncio.Task] = []
 
 
 @app.on_event("startup")
-def on_startup() -> None:
+async def on_startup() -> None:
     init_db()
+    # Build the shared client (and its connection pools) up front.
+    get_llm_client()
+    await job_queue.start()
+    _background.append(asyncio.create_task(run_embedding_backfills(settings.embedding_backfill_interval_seconds)))
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    for task in _background:
+        task.cancel()
+    await asyncio.gather(*_background, return_exceptions=True)
+    _background.clear()
+    await job_queue.stop()
+    await close_llm_client()
+    await dispose_async_engine()
 
 
 @app.get("/health")
@@ -23,4 +45,11 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 app.include_router(task_router, prefix="/api")
+app.include_router(async_task_crud_router if settings.db_async else task_crud_router, prefix="/api")
+app.include_router(job_router, prefix="/api")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, String, func
+
+from src.models.base import Base
+
+
+class TaskEmbedding(Base):
+    __tablename__ = "task_embeddings"
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    model = Column(String(100), primary_key=True)
+    content_hash = Column(String(64), nullable=False)
+    vector = Column(JSON, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    # Lets each process catch its vector index up with rows written by
+    # other processes since its last look (see embedding_service.refresh_index).
+    __table_args__ = (Index("ix_task_embeddings_model_updated_at", "model", "updated_at"),)
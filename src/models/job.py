@@ -0,0 +1,37 @@
+from enum import Enum
+
+from sqlalchemy import Column, DateTime, Enum as SAEnum, Index, JSON, String, Text, func
+
+from src.models.base import Base
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(String(32), primary_key=True)
+    kind = Column(String(50), nullable=False)
+    provider = Column(String(50), nullable=False)
+    status = Column(SAEnum(JobStatus), nullable=False, default=JobStatus.queued)
+    payload = Column(JSON, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # Lease held by the worker process running the job, renewed while it
+    # runs; a running job whose heartbeat is too old is requeued.
+    claimed_by = Column(String(100), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    __table_args__ = (Index("ix_jobs_status_created_at", "status", "created_at"),)
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from enum import Enum
+from typing import Any, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from src.models.job import JobStatus
 from src.models.task import TaskPriority, TaskStatus
 
 
@@ -26,6 +28,10 @@ class TaskUpdate(BaseModel):
     tags: Optional[list[str]] = None
 
 
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+
 class TaskRead(TaskBase):
     id: int
     created_at: datetime
@@ -34,19 +40,69 @@ class TaskRead(TaskBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TaskBulkCreateRequest(BaseModel):
+    # Items are validated one by one so a bad row is reported, not fatal.
+    items: list[dict[str, Any]] = Field(..., min_length=1)
+
+
+class TaskBulkUpdateRequest(BaseModel):
+    # Each item is a TaskUpdate plus the "id" of the task to change.
+    items: list[dict[str, Any]] = Field(..., min_length=1)
+
+
+class TaskBulkDeleteRequest(BaseModel):
+    ids: list[int] = Field(..., min_length=1)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+
+class BulkResponse(BaseModel):
+    results: list[BulkItemResult]
+    succeeded: int
+    failed: int
+
+
+class TagMatchMode(str, Enum):
+    all = "all"
+    any = "any"
+
+
 class TaskQueryParams(BaseModel):
     status: Optional[TaskStatus] = None
     priority: Optional[TaskPriority] = None
     tag: Optional[str] = None
+    # Comma-separated tags, e.g. "work,urgent"; combined with `tag`.
+    tags: Optional[str] = None
+    tag_mode: TagMatchMode = TagMatchMode.all
+    # Full-text, prefix-matching keyword search; results are ranked by
+    # relevance instead of (created_at, id) and use offset paging.
     search: Optional[str] = None
     limit: int = 50
     offset: int = 0
+    # Results are ordered by (created_at, id). Pass the X-Next-Cursor header
+    # of the previous page as `cursor` for keyset paging; `offset` is then
+    # ignored.
+    cursor: Optional[str] = None
+    descending: bool = False
+
+    def tag_list(self) -> list[str]:
+        return [t.strip() for t in (self.tags or "").split(",") if t.strip()]
 
 
 class NaturalLanguageTaskRequest(BaseModel):
     text: str = Field(..., min_length=3)
 
 
+class NaturalLanguageBatchRequest(BaseModel):
+    # Each text is validated like NaturalLanguageTaskRequest.text, per item.
+    texts: list[str] = Field(..., min_length=1, max_length=500)
+
+
 class TagSuggestionRequest(BaseModel):
     title: str
     description: Optional[str] = None
@@ -56,6 +112,34 @@ class TaskSummaryRequest(BaseModel):
     task_ids: Optional[list[int]] = None
 
 
+class SearchMode(str, Enum):
+    semantic = "semantic"
+    lexical = "lexical"
+    hybrid = "hybrid"
+
+
 class TaskSearchRequest(BaseModel):
     query: str
     limit: int = 10
+    mode: SearchMode = SearchMode.semantic
+    # Optional pre-filters; ranking always covers every matching task.
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    tag: Optional[str] = None
+
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: JobStatus
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,6 +1,6 @@
 from enum import Enum
 
-from sqlalchemy import Column, DateTime, Enum as SAEnum, Integer, JSON, String, Text, func
+from sqlalchemy import Column, DateTime, Enum as SAEnum, ForeignKey, Index, Integer, JSON, String, Text, func
 
 from src.models.base import Base
 
@@ -33,3 +33,28 @@ class Task(Base):
         onupdate=func.now(),
         nullable=False,
     )
+
+    # list_tasks orders by (created_at, id) and filters by status and/or
+    # priority; each combination gets an index that serves both the filter
+    # and the sort, so a page is an index range read with no sort step.
+    __table_args__ = (
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tasks_priority_created_at_id", "priority", "created_at", "id"),
+        Index("ix_tasks_status_priority_created_at_id", "status", "priority", "created_at", "id"),
+    )
+
+
+class TaskTag(Base):
+    """
+    Normalized copy of Task.tags, one row per (task, tag), so tag filters can
+    use an index instead of scanning the JSON column. Task.tags remains the
+    source returned by the API; task_service keeps both in sync.
+    """
+
+    __tablename__ = "task_tags"
+
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String(255), primary_key=True)
+
+    __table_args__ = (Index("ix_task_tags_tag_task_id", "tag", "task_id"),)
@@ -0,0 +1,61 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.controllers import task_controller
+from src.models.schemas import TaskCreate, TaskQueryParams, TaskRead, TaskUpdate
+from src.utils.db import get_async_db
+from src.utils.llm_client import LLMClient, get_llm_client
+
+
+# Single-task CRUD on AsyncSession (DB_ASYNC=true): same paths and responses
+# as task_routes.crud_router, without a threadpool hop per request.
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+
+@router.post("", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
+async def create_task(
+    payload: TaskCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> TaskRead:
+    return await task_controller.acreate_task(db, payload, client, background_tasks)
+
+
+@router.get("", response_model=list[TaskRead])
+async def list_tasks(params: TaskQueryParams = Depends(), db: AsyncSession = Depends(get_async_db)) -> Response:
+    try:
+        body, next_cursor = await task_controller.alist_tasks(db, params)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/{task_id}", response_model=TaskRead)
+async def get_task(task_id: int, db: AsyncSession = Depends(get_async_db)) -> Response:
+    body = await task_controller.aget_task(db, task_id)
+    if body is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return Response(body, media_type="application/json")
+
+
+@router.patch("/{task_id}", response_model=TaskRead)
+async def update_task(
+    task_id: int,
+    payload: TaskUpdate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> TaskRead:
+    task = await task_controller.aupdate_task(db, task_id, payload, client, background_tasks)
+    if not task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return task
+
+
+@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_db)) -> None:
+    deleted = await task_controller.adelete_task(db, task_id)
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from src.models.schemas import JobRead
+from src.services import job_service
+from src.utils.db import get_read_db
+
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}", response_model=JobRead)
+def get_job(job_id: str, db: Session = Depends(get_read_db)) -> JobRead:
+    job = job_service.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return JobRead.model_validate(job)
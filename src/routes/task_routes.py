@@ -1,11 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from src.config import settings
 from src.controllers import task_controller
 from src.models.schemas import (
+    BulkResponse,
+    JobAccepted,
+    NaturalLanguageBatchRequest,
     NaturalLanguageTaskRequest,
     TagSuggestionRequest,
+    TaskBulkCreateRequest,
+    TaskBulkDeleteRequest,
+    TaskBulkUpdateRequest,
     TaskCreate,
     TaskQueryParams,
     TaskRead,
@@ -13,82 +23,195 @@ from src.models.schemas import (
     TaskSummaryRequest,
     TaskUpdate,
 )
-from src.utils.db import get_db
-from src.utils.llm_client import LLMClient
+from src.models.task import TaskPriority, TaskStatus
+from src.services import job_service
+from src.utils.db import get_db, get_read_db
+from src.utils.llm_client import LLMClient, get_llm_client
 
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
+# Single-task CRUD, included after `router` so /export and /bulk match before
+# /{task_id}. With DB_ASYNC=true, async_task_routes.router is used instead.
+crud_router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
-def get_llm_client() -> LLMClient:
-    return LLMClient(provider=settings.llm_provider, api_key=settings.llm_api_key)
+@crud_router.post("", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
+def create_task(
+    payload: TaskCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> TaskRead:
+    return task_controller.create_task(db, payload, client, background_tasks)
+
+
+@crud_router.get("", response_model=list[TaskRead])
+def list_tasks(params: TaskQueryParams = Depends(), db: Session = Depends(get_read_db)) -> Response:
+    try:
+        body, next_cursor = task_controller.list_tasks(db, params)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # Already-serialized JSON from the task cache, returned as is.
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/export")
+def export_tasks(
+    task_status: Optional[TaskStatus] = Query(None, alias="status"),
+    priority: Optional[TaskPriority] = None,
+    tag: Optional[str] = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        task_controller.export_tasks(task_status, priority, tag),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/bulk", response_model=BulkResponse)
+def bulk_create_tasks(
+    req: TaskBulkCreateRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> BulkResponse:
+    return task_controller.bulk_create_tasks(db, req, client, background_tasks)
 
 
-@router.post("", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
-def create_task(payload: TaskCreate, db: Session = Depends(get_db)) -> TaskRead:
-    return task_controller.create_task(db, payload)
+@router.patch("/bulk", response_model=BulkResponse)
+def bulk_update_tasks(
+    req: TaskBulkUpdateRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> BulkResponse:
+    return task_controller.bulk_update_tasks(db, req, client, background_tasks)
 
 
-@router.get("", response_model=list[TaskRead])
-def list_tasks(params: TaskQueryParams = Depends(), db: Session = Depends(get_db)) -> list[TaskRead]:
-    return task_controller.list_tasks(db, params)
+@router.delete("/bulk", response_model=BulkResponse)
+def bulk_delete_tasks(req: TaskBulkDeleteRequest, db: Session = Depends(get_db)) -> BulkResponse:
+    return task_controller.bulk_delete_tasks(db, req)
 
 
-@router.get("/{task_id}", response_model=TaskRead)
-def get_task(task_id: int, db: Session = Depends(get_db)) -> TaskRead:
-    task = task_controller.get_task(db, task_id)
-    if not task:
+@crud_router.get("/{task_id}", response_model=TaskRead)
+def get_task(task_id: int, db: Session = Depends(get_read_db)) -> Response:
+    body = task_controller.get_task(db, task_id)
+    if body is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
-    return task
+    return Response(body, media_type="application/json")
 
 
-@router.patch("/{task_id}", response_model=TaskRead)
-def update_task(task_id: int, payload: TaskUpdate, db: Session = Depends(get_db)) -> TaskRead:
-    task = task_controller.update_task(db, task_id, payload)
+@crud_router.patch("/{task_id}", response_model=TaskRead)
+def update_task(
+    task_id: int,
+    payload: TaskUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> TaskRead:
+    task = task_controller.update_task(db, task_id, payload, client, background_tasks)
     if not task:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
     return task
 
 
-@router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
+@crud_router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_task(task_id: int, db: Session = Depends(get_db)) -> None:
     deleted = task_controller.delete_task(db, task_id)
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
 
 
-@router.post("/natural-language", response_model=TaskRead, status_code=status.HTTP_201_CREATED)
-def create_task_from_nl(
+async def _enqueue(db: Session, kind: str, payload: dict, client: LLMClient) -> JSONResponse:
+    if job_service.job_queue.full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Job queue is full, retry later",
+            headers={"Retry-After": str(math.ceil(job_service.job_queue.heartbeat_seconds))},
+        )
+    job = await run_in_threadpool(job_service.create_job, db, kind, payload, client.provider)
+    # If the queue filled up in the meantime the job stays queued in the
+    # database and is picked up once there is room.
+    job_service.job_queue.enqueue(job.id)
+    accepted = JobAccepted(job_id=job.id, status=job.status)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted.model_dump(mode="json"))
+
+
+# The AI routes below accept ?async_mode=true to enqueue the work and return
+# 202 with a job id right away; poll GET /api/jobs/{job_id} for the result.
+
+
+@router.post(
+    "/natural-language",
+    response_model=TaskRead,
+    status_code=status.HTTP_201_CREATED,
+    responses={202: {"model": JobAccepted}},
+)
+async def create_task_from_nl(
     req: NaturalLanguageTaskRequest,
+    async_mode: bool = False,
     db: Session = Depends(get_db),
     client: LLMClient = Depends(get_llm_client),
 ) -> TaskRead:
-    return task_controller.create_task_from_nl(db, req, client)
+    if async_mode:
+        return await _enqueue(db, "natural_language", req.model_dump(), client)
+    return await task_controller.create_task_from_nl(db, req, client)
+
+
+@router.post("/natural-language/batch", response_model=BulkResponse)
+async def create_tasks_from_nl_batch(
+    req: NaturalLanguageBatchRequest,
+    db: Session = Depends(get_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> BulkResponse:
+    return await task_controller.create_tasks_from_nl_batch(db, req, client)
 
 
-@router.post("/{task_id}/tags/suggestions")
-def suggest_tags(
+@router.post("/{task_id}/tags/suggestions", responses={202: {"model": JobAccepted}})
+async def suggest_tags(
     task_id: int,
     req: TagSuggestionRequest,
+    async_mode: bool = False,
     db: Session = Depends(get_db),
     client: LLMClient = Depends(get_llm_client),
 ) -> dict:
-    return task_controller.suggest_tags(db, task_id, req, client)
+    if async_mode:
+        return await _enqueue(db, "tag_suggestion", {"task_id": task_id, "request": req.model_dump()}, client)
+    return await task_controller.suggest_tags(db, task_id, req, client)
 
 
-@router.post("/summary")
-def summarize_tasks(
+@router.post("/summary", responses={202: {"model": JobAccepted}})
+async def summarize_tasks(
     req: TaskSummaryRequest,
+    async_mode: bool = False,
     db: Session = Depends(get_db),
     client: LLMClient = Depends(get_llm_client),
 ) -> dict:
-    return task_controller.summarize_tasks(db, req, client)
+    if async_mode:
+        return await _enqueue(db, "summary", req.model_dump(), client)
+    try:
+        return await task_controller.summarize_tasks(db, req, client)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+@router.post("/summary/stream")
+async def stream_summary(
+    req: TaskSummaryRequest,
+    db: Session = Depends(get_db),
+    client: LLMClient = Depends(get_llm_client),
+) -> StreamingResponse:
+    try:
+        events = await task_controller.stream_summary(db, req, client)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return StreamingResponse(events, media_type="text/event-stream")
 
 
 @router.post("/search")
-def semantic_search(
+async def semantic_search(
     req: TaskSearchRequest,
     db: Session = Depends(get_db),
     client: LLMClient = Depends(get_llm_client),
 ) -> dict:
-    return task_controller.semantic_search(db, req, client)
+    return await task_controller.semantic_search(db, req, client)
@@ -1,9 +1,14 @@
+import asyncio
 import json
-from typing import Iterable
+from typing import AsyncIterator, Awaitable, Iterable
 
+from src.config import settings
 from src.models.schemas import TagSuggestionRequest
 from src.models.task import Task, TaskPriority
-from src.utils.llm_client import LLMClient
+from src.utils.cache import LRUCache, make_key
+from src.utils.llm_client import LLMClient, estimate_tokens
+from src.utils.metrics import REGISTRY
+from src.utils.resilience import LLMError
 
 
 def _priority_from_string(value: str) -> TaskPriority:
@@ -31,21 +36,46 @@ def parse_natural_language_task(text: str, client: LLMClient) -> dict:
       }
 
     If parsing or validation fails, this function raises ValueError so the API
-    layer can return a clear 400 error to the user.
+    layer can return a clear 400 error to the user. If the provider itself is
+    unavailable, the local stub parse is used instead.
     """
     # For the stub provider, keep behaviour deterministic and local.
     if client.provider == "stub":
-        first_sentence = text.split(".")[0].strip()
-        title = first_sentence[:80] or text[:80]
-        priority = _priority_from_string("medium")
-        return {
-            "title": title,
-            "description": text,
-            "priority": priority,
-            "tags": [],
-        }
-
-    prompt = f"""
+        return _stub_parse(text)
+    try:
+        raw = client.generate(_nl_prompt(text))
+    except LLMError:
+        return _stub_parse(text)
+    return _parse_nl_response(raw, text)
+
+
+async def aparse_natural_language_task(text: str, client: LLMClient) -> dict:
+    """
+    Async variant of parse_natural_language_task().
+    """
+    if client.provider == "stub":
+        return _stub_parse(text)
+    try:
+        raw = await client.agenerate(_nl_prompt(text))
+    except LLMError:
+        return _stub_parse(text)
+    return _parse_nl_response(raw, text)
+
+
+def _stub_parse(text: str) -> dict:
+    first_sentence = text.split(".")[0].strip()
+    title = first_sentence[:80] or text[:80]
+    priority = _priority_from_string("medium")
+    return {
+        "title": title,
+        "description": text,
+        "priority": priority,
+        "tags": [],
+    }
+
+
+def _nl_prompt(text: str) -> str:
+    return f"""
 Given the following command:
 "{text}"
 Extract fields title, description, priority and tags, and return ONLY valid JSON. priority should be one of low, medium, high:
@@ -56,9 +86,9 @@ Extract fields title, description, priority and tags, and return ONLY valid JSON
   "tags": ["tag1", "tag2"]
 }}
 """
-    raw = client.generate(prompt)
-    print(raw)
 
+
+def _parse_nl_response(raw: str, text: str) -> dict:
     try:
         data = json.loads(raw)
     except json.JSONDecodeError as exc:
@@ -81,11 +111,8 @@ Extract fields title, description, priority and tags, and return ONLY valid JSON
     if not isinstance(tags_raw, list):
         raise ValueError("Field 'tags' must be a list.")
 
-    try:
-        priority = _priority_from_string(priority_str)
-    except ValueError as exc:
-        # Surface invalid priority back to caller
-        raise
+    # Surfaces invalid priority back to caller as ValueError
+    priority = _priority_from_string(priority_str)
 
     tags = [str(tag).strip() for tag in tags_raw if str(tag).strip()]
 
@@ -103,34 +130,55 @@ def suggest_tags_and_priority(task: Task | None, prompt: TagSuggestionRequest, c
 
     For non-LLM providers, falls back to a simple heuristic based on text.
     """
-    base_title = prompt.title
-    base_description = prompt.description or ""
+    if client.provider != "stub" and client.api_key:
+        try:
+            raw = client.generate(_tag_prompt(prompt))
+        except LLMError:
+            raw = ""
+        priority, tags = _parse_tag_response(raw, prompt)
+    else:
+        priority, tags = _heuristic_tags(prompt)
+    return _tag_result(task, priority, tags, client)
+
+
+async def asuggest_tags_and_priority(task: Task | None, prompt: TagSuggestionRequest, client: LLMClient) -> dict:
+    """
+    Async variant of suggest_tags_and_priority().
+    """
+    if client.provider != "stub" and client.api_key:
+        try:
+            raw = await client.agenerate(_tag_prompt(prompt))
+        except LLMError:
+            raw = ""
+        priority, tags = _parse_tag_response(raw, prompt)
+    else:
+        priority, tags = _heuristic_tags(prompt)
+    return _tag_result(task, priority, tags, client)
+
 
+def _heuristic_tags(prompt: TagSuggestionRequest) -> tuple[TaskPriority, list[str]]:
     # Heuristic fallback (also used on errors)
-    def _heuristic() -> tuple[TaskPriority, list[str]]:
-        text = f"{base_title} {base_description}".lower()
-        if "urgent" in text or "high" in text:
-            prio = TaskPriority.high
-        elif "low" in text:
-            prio = TaskPriority.low
-        else:
-            prio = TaskPriority.medium
-
-        tags: list[str] = []
-        for candidate in ["work", "personal", "shopping", "school", "research", "ai", "coding"]:
-            if candidate in text:
-                tags.append(candidate)
-        return prio, tags
-
-    priority = None
+    text = f"{prompt.title} {prompt.description or ''}".lower()
+    if "urgent" in text or "high" in text:
+        prio = TaskPriority.high
+    elif "low" in text:
+        prio = TaskPriority.low
+    else:
+        prio = TaskPriority.medium
+
     tags: list[str] = []
+    for candidate in ["work", "personal", "shopping", "school", "research", "ai", "coding"]:
+        if candidate in text:
+            tags.append(candidate)
+    return prio, tags
 
-    if client.provider != "stub" and client.api_key:
-        llm_prompt = f"""
+
+def _tag_prompt(prompt: TagSuggestionRequest) -> str:
+    return f"""
 You help assign priority and tags to tasks.
 
-Task title: "{base_title}"
-Task description: "{base_description}"
+Task title: "{prompt.title}"
+Task description: "{prompt.description or ""}"
 
 Return ONLY valid JSON in this format:
 {{
@@ -138,26 +186,29 @@ Return ONLY valid JSON in this format:
   "tags": ["tag1", "tag2"]
 }}
 """
-        raw = client.generate(llm_prompt)
-        try:
-            data = json.loads(raw)
-            if not isinstance(data, dict):
-                raise ValueError("LLM response must be a JSON object.")
-
-            if "priority" not in data or "tags" not in data:
-                raise ValueError("LLM response missing required fields 'priority' or 'tags'.")
-
-            priority = _priority_from_string(str(data["priority"]))
-            tags_raw = data["tags"]
-            if not isinstance(tags_raw, list):
-                raise ValueError("Field 'tags' must be a list.")
-            tags = [str(tag).strip() for tag in tags_raw if str(tag).strip()]
-        except Exception:
-            # Fall back to heuristic if anything goes wrong
-            priority, tags = _heuristic()
-    else:
-        priority, tags = _heuristic()
 
+
+def _parse_tag_response(raw: str, prompt: TagSuggestionRequest) -> tuple[TaskPriority, list[str]]:
+    try:
+        data = json.loads(raw)
+        if not isinstance(data, dict):
+            raise ValueError("LLM response must be a JSON object.")
+
+        if "priority" not in data or "tags" not in data:
+            raise ValueError("LLM response missing required fields 'priority' or 'tags'.")
+
+        priority = _priority_from_string(str(data["priority"]))
+        tags_raw = data["tags"]
+        if not isinstance(tags_raw, list):
+            raise ValueError("Field 'tags' must be a list.")
+        tags = [str(tag).strip() for tag in tags_raw if str(tag).strip()]
+        return priority, tags
+    except Exception:
+        # Fall back to heuristic if anything goes wrong
+        return _heuristic_tags(prompt)
+
+
+def _tag_result(task: Task | None, priority: TaskPriority, tags: list[str], client: LLMClient) -> dict:
     suggestion_text = f"priority={priority.value}, tags={tags}"
 
     return {
@@ -174,109 +225,249 @@ def summarize_tasks(tasks: Iterable[Task], client: LLMClient) -> dict:
     Produce a short natural-language summary over a list of tasks.
 
     Uses the LLM when configured; otherwise falls back to a simple
-    deterministic summary.
+    deterministic summary. Large lists are summarized chunk by chunk and the
+    partial summaries merged (see asummarize_tasks).
     """
     tasks_list = list(tasks)
-    titles = [t.title for t in tasks_list]
+    if client.provider != "stub" and client.api_key and tasks_list:
+        partials = [_summarize_chunk(chunk, client) for chunk in _chunk_tasks(tasks_list)]
+        while len(partials) > 1:
+            partials = [_merge_summaries(group, client) for group in _group_summaries(partials)]
+        summary_text = partials[0]
+    else:
+        summary_text = _fallback_summary(tasks_list)
+    return {"summary": summary_text, "count": len(tasks_list), "provider": client.info()}
 
-    # Fallback summary if we can't or don't want to call an LLM
-    def _fallback() -> str:
-        if not titles:
-            return "No tasks to summarize."
-        if len(titles) == 1:
-            return f"1 task: {titles[0]}"
-        return f"{len(titles)} tasks, including: " + "; ".join(titles[:3])
 
-    summary_text: str
+async def asummarize_tasks(tasks: Iterable[Task], client: LLMClient) -> dict:
+    """
+    Async variant of summarize_tasks().
 
+    Map-reduce: tasks are split into chunks of roughly SUMMARY_CHUNK_TOKENS
+    prompt tokens, the chunks are summarized concurrently, then the partial
+    summaries are merged, a budget's worth at a time, until one is left.
+    Chunk summaries are cached, so after an edit only that task's chunk (and
+    the merge steps) are sent to the provider again.
+    """
+    tasks_list = list(tasks)
     if client.provider != "stub" and client.api_key and tasks_list:
-        lines = []
-        for t in tasks_list:
-            lines.append(f"- [id={t.id}] {t.title}: {t.description or ''}")
-        task_block = "\n".join(lines)
+        partials = await _apartial_summaries(_chunk_tasks(tasks_list), client)
+        summary_text = partials[0] if len(partials) == 1 else await _amerge_summaries(partials, client)
+    else:
+        summary_text = _fallback_summary(tasks_list)
+    return {"summary": summary_text, "count": len(tasks_list), "provider": client.info()}
+
+
+async def astream_summary(tasks: Iterable[Task], client: LLMClient) -> AsyncIterator[str]:
+    """
+    Streaming variant of asummarize_tasks(): yields plain summary text as the
+    provider produces it.
+
+    Only the last LLM call is streamed; for large sets the chunk summaries
+    and intermediate merges are computed first.
+    """
+    tasks_list = list(tasks)
+    if not (client.provider != "stub" and client.api_key and tasks_list):
+        yield _fallback_summary(tasks_list)
+        return
+    chunks = _chunk_tasks(tasks_list)
+    if len(chunks) == 1:
+        prompt = _summary_prompt(chunks[0], reply=_PLAIN_REPLY)
+    else:
+        prompt = _merge_prompt(await _apartial_summaries(chunks, client), reply=_PLAIN_REPLY)
+    streamed = False
+    try:
+        async for delta in client.astream(prompt):
+            streamed = True
+            yield delta
+    except LLMError:
+        if not streamed:
+            yield _fallback_summary(tasks_list)
+
+
+async def _apartial_summaries(chunks: list[list[Task]], client: LLMClient) -> list[str]:
+    """Summarize chunks concurrently, then merge until the rest fit one final merge."""
+    semaphore = asyncio.Semaphore(settings.summary_concurrency)
+
+    async def _limited(coro: Awaitable[str]) -> str:
+        async with semaphore:
+            return await coro
+
+    partials = list(await asyncio.gather(*(_limited(_asummarize_chunk(chunk, client)) for chunk in chunks)))
+    while len(partials) > 1:
+        groups = _group_summaries(partials)
+        if len(groups) == 1:
+            break
+        partials = list(await asyncio.gather(*(_limited(_amerge_summaries(group, client)) for group in groups)))
+    return partials
+
+
+# Chunk summaries, keyed by provider and each task's id, updated_at and
+# prompt line (updated_at alone has one-second resolution on SQLite).
+_chunk_summaries = LRUCache(max_entries=settings.summary_cache_max_entries)
+
+
+def _collect_chunk_cache_stats() -> list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]:
+    stats = _chunk_summaries.stats()
+    samples = [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]
+    return [("summary_chunk_cache_requests_total", "counter", "Chunk summary cache lookups by result.", samples)]
+
+
+REGISTRY.register_collector(_collect_chunk_cache_stats)
+
+
+def _chunk_tasks(tasks: list[Task]) -> list[list[Task]]:
+    # Chunks follow fixed id ranges of SUMMARY_CHUNK_SIZE ids, so editing,
+    # adding or deleting a task only changes the chunks of its own range. A
+    # range over the token budget is split further, within that range.
+    budget = settings.summary_chunk_tokens
+    size = settings.summary_chunk_size
+    chunks: list[list[Task]] = []
+    current: list[Task] = []
+    current_range = None
+    used = 0
+    for task in sorted(tasks, key=lambda t: t.id or 0):
+        id_range = (task.id or 0) // size
+        cost = estimate_tokens(_summary_line(task))
+        if current and (id_range != current_range or used + cost > budget):
+            chunks.append(current)
+            current, used = [], 0
+        current.append(task)
+        current_range = id_range
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _group_summaries(partials: list[str]) -> list[list[str]]:
+    # At least two partials per group, so every reduce round shrinks the list.
+    budget = settings.summary_chunk_tokens
+    groups: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for text in partials:
+        cost = estimate_tokens(text)
+        if len(current) >= 2 and used + cost > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(text)
+        used += cost
+    groups.append(current)
+    return groups
+
+
+def _chunk_key(chunk: list[Task], client: LLMClient) -> str:
+    return make_key("summary_chunk", client.provider, [(t.id, t.updated_at, _summary_line(t)) for t in chunk])
+
+
+def _summarize_chunk(chunk: list[Task], client: LLMClient) -> str:
+    key = _chunk_key(chunk, client)
+    cached = _chunk_summaries.get(key)
+    if cached is not None:
+        return cached
+    try:
+        summary = _extract_summary(client.generate(_summary_prompt(chunk)))
+    except LLMError:
+        summary = None
+    if summary is None:
+        return _fallback_summary(chunk)
+    _chunk_summaries.set(key, summary)
+    return summary
+
+
+async def _asummarize_chunk(chunk: list[Task], client: LLMClient) -> str:
+    key = _chunk_key(chunk, client)
+    cached = _chunk_summaries.get(key)
+    if cached is not None:
+        return cached
+    try:
+        summary = _extract_summary(await client.agenerate(_summary_prompt(chunk)))
+    except LLMError:
+        summary = None
+    if summary is None:
+        return _fallback_summary(chunk)
+    _chunk_summaries.set(key, summary)
+    return summary
+
+
+def _merge_summaries(group: list[str], client: LLMClient) -> str:
+    if len(group) == 1:
+        return group[0]
+    try:
+        return _extract_summary(client.generate(_merge_prompt(group))) or " ".join(group)
+    except LLMError:
+        return " ".join(group)
+
+
+async def _amerge_summaries(group: list[str], client: LLMClient) -> str:
+    if len(group) == 1:
+        return group[0]
+    try:
+        return _extract_summary(await client.agenerate(_merge_prompt(group))) or " ".join(group)
+    except LLMError:
+        return " ".join(group)
+
+
+def _fallback_summary(tasks: list[Task]) -> str:
+    # Fallback summary if we can't or don't want to call an LLM
+    titles = [t.title for t in tasks]
+    if not titles:
+        return "No tasks to summarize."
+    if len(titles) == 1:
+        return f"1 task: {titles[0]}"
+    return f"{len(titles)} tasks, including: " + "; ".join(titles[:3])
+
+
+def _summary_line(task: Task) -> str:
+    line = f"- [id={task.id}] {task.title}: {task.description or ''}"
+    # A single huge description must still fit in one chunk.
+    return line[: settings.summary_chunk_tokens * 4]
+
 
-        prompt = f"""
+_JSON_REPLY = """Return ONLY valid JSON in this format:
+{
+  "summary": "One or two sentences summarizing the tasks."
+}"""
+
+_PLAIN_REPLY = "Reply with one or two plain sentences summarizing the tasks, without JSON or markdown."
+
+
+def _summary_prompt(tasks: list[Task], reply: str = _JSON_REPLY) -> str:
+    task_block = "\n".join(_summary_line(t) for t in tasks)
+
+    return f"""
 You are summarizing a user's task list.
 
 Tasks:
 {task_block}
 
-Return ONLY valid JSON in this format:
-{{
-  "summary": "One or two sentences summarizing the tasks."
-}}
+{reply}
 """
-        raw = client.generate(prompt)
-        try:
-            data = json.loads(raw)
-            if not isinstance(data, dict) or "summary" not in data:
-                raise ValueError("LLM response missing 'summary'.")
-            summary_text = str(data["summary"]).strip() or _fallback()
-        except Exception:
-            summary_text = _fallback()
-    else:
-        summary_text = _fallback()
 
-    return {"summary": summary_text, "count": len(tasks_list), "provider": client.info()}
 
+def _merge_prompt(partials: list[str], reply: str = _JSON_REPLY) -> str:
+    partial_block = "\n".join(f"- {p}" for p in partials)
 
-def semantic_search(query: str, tasks: list[Task], client: LLMClient, limit: int = 10) -> dict:
-    """
-    Semantic search over tasks using embeddings + cosine similarity.
+    return f"""
+You are combining partial summaries of one user's task list.
 
-    - Uses client.embed(...) for both the query and each task.
-    - Falls back to a simple tag-overlap score if embeddings are unavailable
-      or an error occurs.
-    """
-    if not tasks:
-        return {"results": [], "provider": client.info()}
-
-    def _cosine(a: list[float], b: list[float]) -> float:
-        if not a or not b or len(a) != len(b):
-            return 0.0
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(y * y for y in b) ** 0.5
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return float(dot / (norm_a * norm_b))
-
-    def _fallback() -> list[dict]:
-        # Original lexical/tag overlap scoring
-        query_terms = set(query.lower().split())
-        scored_local: list[dict] = []
-        for t in tasks:
-            tag_terms = set(tag.lower() for tag in (t.tags or []))
-            score = float(len(query_terms & tag_terms))
-            scored_local.append({"task_id": t.id, "title": t.title, "score": score})
-        scored_local.sort(key=lambda x: x["score"], reverse=True)
-        return scored_local[:limit]
+Partial summaries:
+{partial_block}
 
-    try:
-        query_vec = client.embed(query)
-        if not isinstance(query_vec, list) or not query_vec:
-            raise ValueError("Invalid query embedding.")
+{reply}
+"""
 
-        scored: list[dict] = []
-        for t in tasks:
-            # Combine title, description, and tags into a single text for embedding
-            combined = f"{t.title} {t.description or ''} {' '.join(t.tags or [])}"
-            task_vec = client.embed(combined)
-            if not isinstance(task_vec, list) or not task_vec:
-                score = 0.0
-            else:
-                score = _cosine(query_vec, task_vec)
-            scored.append({"task_id": t.id, "title": t.title, "score": score})
-
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        final = scored[:limit]
-        # If all scores are zero, embeddings likely failed silently; fall back.
-        if not final or all(item["score"] == 0.0 for item in final):
-            final = _fallback()
-    except Exception:
-        final = _fallback()
 
-    return {"results": final, "provider": client.info()}
+def _extract_summary(raw: str) -> str | None:
+    """Return the "summary" field of an LLM JSON response, or None if unusable."""
+    try:
+        data = json.loads(raw)
+        if not isinstance(data, dict) or "summary" not in data:
+            raise ValueError("LLM response missing 'summary'.")
+        return str(data["summary"]).strip() or None
+    except Exception:
+        return None
 
 
 if __name__ == "__main__":
@@ -323,7 +514,3 @@ if __name__ == "__main__":
         # 3) Test summarization over all tasks
         summary = summarize_tasks(tasks, llm_client)
         print("\nSummary over all tasks:", summary)
-
-        # 4) Test semantic search over all tasks
-        search_result = semantic_search("do coding job", tasks, llm_client, limit=5)
-        print("\nSemantic search results:", search_result)
\ No newline at end of file
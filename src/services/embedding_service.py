@@ -0,0 +1,271 @@
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import Exists
+from starlette.concurrency import run_in_threadpool
+
+from src.models.embedding import TaskEmbedding
+from src.models.task import Task
+from src.utils.db import SessionLocal, timestamp_param
+from src.utils.llm_client import LLMClient
+from src.utils.resilience import LLMError
+from src.utils.vector_index import VectorIndex
+
+
+# Task fields that feed the embedding text; changing any of them makes the
+# stored vector stale.
+EMBEDDED_FIELDS = frozenset({"title", "description", "tags"})
+
+# One in-memory index per embedding model, shared by all requests.
+_indexes: dict[str, VectorIndex] = {}
+# model -> newest task_embeddings.updated_at loaded into its index
+_watermarks: dict[str, datetime | None] = {}
+_indexes_lock = threading.Lock()
+# Rows are re-read this far behind the watermark: timestamps have one-second
+# resolution on SQLite, and a row stamped just before the watermark may only
+# commit after it was taken.
+_REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def task_embedding_text(task: Task) -> str:
+    # Combine title, description, and tags into a single text for embedding
+    return f"{task.title} {task.description or ''} {' '.join(task.tags or [])}"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def sync_task_embedding(db: Session, task: Task, client: LLMClient) -> None:
+    """
+    Make sure the stored embedding for `task` matches its current content.
+
+    Does nothing when the stored content hash is unchanged. Provider errors
+    are swallowed: a stale row is dropped so the task counts as missing and
+    gets picked up by the next backfill (see job_service).
+    """
+    text = task_embedding_text(task)
+    digest = content_hash(text)
+    row = db.get(TaskEmbedding, (task.id, client.embedding_model))
+    if row is not None and row.content_hash == digest:
+        return
+
+    try:
+        vector = client.embed(text, strict=True)
+    except LLMError:
+        if row is not None:
+            db.delete(row)
+            db.commit()
+            get_index(db, client.embedding_model).remove(task.id)
+        return
+
+    _store(db, row, task.id, client.embedding_model, digest, vector)
+    db.commit()
+    get_index(db, client.embedding_model).upsert(task.id, vector)
+
+
+async def async_task_embedding(db: AsyncSession, task: Task, client: LLMClient) -> None:
+    """
+    Async variant of sync_task_embedding() for AsyncSession callers: the
+    provider call is awaited and the row is written through run_sync. The
+    index is loaded on a worker thread (see aget_index()).
+    """
+    model = client.embedding_model
+    text = task_embedding_text(task)
+    digest = content_hash(text)
+    row = await db.get(TaskEmbedding, (task.id, model))
+    if row is not None and row.content_hash == digest:
+        return
+
+    try:
+        vector = await client.aembed(text, strict=True)
+    except LLMError:
+        if row is not None:
+            await db.delete(row)
+            await db.commit()
+            (await aget_index(model)).remove(task.id)
+        return
+
+    await db.run_sync(_store, row, task.id, model, digest, vector)
+    await db.commit()
+    (await aget_index(model)).upsert(task.id, vector)
+
+
+def ensure_task_embeddings(db: Session, tasks: Iterable[Task], client: LLMClient) -> None:
+    """
+    Make sure every task in `tasks` has a current vector, both in the database
+    and in the in-process index. Only tasks whose stored vector is missing or
+    out of date are sent to the provider, in a single batched embed_many().
+    """
+    tasks_list = list(tasks)
+    if not tasks_list:
+        return
+
+    model = client.embedding_model
+    index = get_index(db, model)
+    stmt = select(TaskEmbedding).where(
+        TaskEmbedding.model == model,
+        TaskEmbedding.task_id.in_([t.id for t in tasks_list]),
+    )
+    rows = {row.task_id: row for row in db.execute(stmt).scalars()}
+
+    fresh: list[tuple[int, list[float]]] = []
+    pending: list[tuple[Task, str, str]] = []
+    for t in tasks_list:
+        text = task_embedding_text(t)
+        digest = content_hash(text)
+        row = rows.get(t.id)
+        if row is not None and row.content_hash == digest:
+            if t.id not in index:
+                # Written by another worker process since the index was loaded.
+                fresh.append((t.id, row.vector))
+            continue
+        pending.append((t, text, digest))
+
+    if pending:
+        try:
+            vectors = client.embed_many([text for _, text, _ in pending], strict=True)
+        except LLMError:
+            vectors = []
+        for (t, _, digest), vector in zip(pending, vectors):
+            _store(db, rows.get(t.id), t.id, model, digest, vector)
+            fresh.append((t.id, vector))
+
+    if fresh:
+        db.commit()
+        index.upsert_many(fresh)
+
+
+def has_missing_embeddings(db: Session, model: str) -> bool:
+    """Whether any task lacks a stored vector for `model` (stops at the first one)."""
+    stmt = select(Task.id).where(~_has_vector(model)).limit(1)
+    return db.execute(stmt).first() is not None
+
+
+def backfill_missing_embeddings(db: Session, client: LLMClient, limit: int, chunk_size: int = 500) -> int:
+    """
+    Embed up to `limit` tasks that have no stored vector for the client's
+    model, `chunk_size` at a time. Returns the number of tasks processed.
+
+    Not for the request path: it scans for missing rows and may make many
+    provider calls. Runs as a background job or from the CLI below.
+    """
+    model = client.embedding_model
+    processed = 0
+    while processed < limit:
+        stmt = select(Task).where(~_has_vector(model)).order_by(Task.id).limit(min(chunk_size, limit - processed))
+        chunk = list(db.execute(stmt).scalars())
+        if not chunk:
+            break
+        before = len(get_index(db, model))
+        ensure_task_embeddings(db, chunk, client)
+        processed += len(chunk)
+        if len(get_index(db, model)) == before:
+            # Provider is failing; the same rows would come back next round.
+            break
+    return processed
+
+
+def _has_vector(model: str) -> Exists:
+    return select(TaskEmbedding.task_id).where(TaskEmbedding.task_id == Task.id, TaskEmbedding.model == model).exists()
+
+
+def get_index(db: Session, model: str) -> VectorIndex:
+    """
+    Return the process-wide vector index for `model`, loading it from the
+    task_embeddings table on first use.
+    """
+    index = _indexes.get(model)
+    if index is not None:
+        return index
+    with _indexes_lock:
+        if model not in _indexes:
+            _indexes[model] = VectorIndex()
+            _load_since(db, model, None)
+        return _indexes[model]
+
+
+async def aget_index(model: str) -> VectorIndex:
+    """
+    get_index() for async callers. The first load reads and decodes every
+    stored vector for `model`, so it runs on a worker thread with its own
+    session instead of on the event loop.
+    """
+    index = _indexes.get(model)
+    if index is not None:
+        return index
+    return await run_in_threadpool(_load_index, model)
+
+
+def _load_index(model: str) -> VectorIndex:
+    with SessionLocal() as db:
+        return get_index(db, model)
+
+
+def refresh_index(db: Session, model: str) -> VectorIndex:
+    """
+    get_index(), caught up with vectors other worker processes wrote since
+    the last refresh. Each process only upserts its own writes directly, so
+    searches call this first; with the (model, updated_at) index it reads
+    just the recently changed rows.
+
+    Deleted tasks are not seen here; search drops them from the index when
+    their rows turn out to be gone (see forget_task()).
+    """
+    index = get_index(db, model)
+    with _indexes_lock:
+        watermark = _watermarks.get(model)
+        _load_since(db, model, watermark - _REFRESH_OVERLAP if watermark else None)
+    return index
+
+
+def _load_since(db: Session, model: str, since: datetime | None) -> None:
+    # Caller holds _indexes_lock.
+    stmt = select(TaskEmbedding.task_id, TaskEmbedding.vector, TaskEmbedding.updated_at).where(TaskEmbedding.model == model)
+    if since is not None:
+        stmt = stmt.where(TaskEmbedding.updated_at >= timestamp_param(db, since))
+    latest = _watermarks.get(model)
+    batch: list[tuple[int, list[float]]] = []
+    for task_id, vector, updated_at in db.execute(stmt.execution_options(yield_per=1000)):
+        batch.append((task_id, vector))
+        if latest is None or updated_at > latest:
+            latest = updated_at
+    _indexes[model].upsert_many(batch)
+    _watermarks[model] = latest
+
+
+def forget_task(task_id: int) -> None:
+    """Drop a deleted task from every loaded index."""
+    for index in list(_indexes.values()):
+        index.remove(task_id)
+
+
+def _store(
+    db: Session,
+    row: TaskEmbedding | None,
+    task_id: int,
+    model: str,
+    digest: str,
+    vector: list[float],
+) -> None:
+    if row is None:
+        db.add(TaskEmbedding(task_id=task_id, model=model, content_hash=digest, vector=vector))
+    else:
+        row.content_hash = digest
+        row.vector = vector
+
+
+if __name__ == "__main__":
+    # Embed every task that has no stored vector for the configured model:
+    #   python -m src.services.embedding_service
+    from src.config import settings
+
+    llm_client = LLMClient(provider=settings.llm_provider, api_key=settings.llm_api_key)
+    with SessionLocal() as session:
+        total = backfill_missing_embeddings(session, llm_client, limit=10**9)
+    print(f"Embedded {total} tasks with model {llm_client.embedding_model}")
@@ -0,0 +1,286 @@
+import asyncio
+import os
+import socket
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.config import settings
+from src.models.job import Job, JobStatus
+from src.services import embedding_service
+from src.utils.db import SessionLocal, timestamp_param
+from src.utils.llm_client import LLMClient, get_llm_client
+
+
+# Names this process in the `claimed_by` lease of the jobs it runs.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+JobHandler = Callable[[Session, dict[str, Any], LLMClient], Awaitable[Any]]
+
+
+async def _embedding_backfill(db: Session, payload: dict[str, Any], client: LLMClient) -> Any:
+    limit = payload.get("limit", settings.embedding_backfill_limit)
+    embedded = await run_in_threadpool(embedding_service.backfill_missing_embeddings, db, client, limit)
+    return {"embedded": embedded, "model": client.embedding_model}
+
+
+# Job kind -> handler. Layers above this one register their own kinds
+# (see task_controller) rather than being imported from here.
+HANDLERS: dict[str, JobHandler] = {
+    "embedding_backfill": _embedding_backfill,
+}
+
+
+def register_handler(kind: str, handler: JobHandler) -> None:
+    HANDLERS[kind] = handler
+
+
+def create_job(db: Session, kind: str, payload: dict[str, Any], provider: str) -> Job:
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = Job(
+        id=uuid.uuid4().hex,
+        kind=kind,
+        provider=provider,
+        status=JobStatus.queued,
+        payload=jsonable_encoder(payload),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: str) -> Optional[Job]:
+    return db.get(Job, job_id)
+
+
+def schedule_embedding_backfill(db: Session, client: LLMClient) -> Optional[Job]:
+    """
+    Queue a background embedding backfill when some task has no vector for
+    the client's model and no backfill is already pending. Search never
+    embeds tasks itself; this is the safety net for rows written without one.
+    """
+    if settings.embedding_backfill_limit <= 0:
+        return None
+    pending = select(Job.id).where(Job.kind == "embedding_backfill", Job.status.in_([JobStatus.queued, JobStatus.running]))
+    if db.execute(pending.limit(1)).first() is not None:
+        return None
+    if not embedding_service.has_missing_embeddings(db, client.embedding_model):
+        return None
+    return create_job(db, "embedding_backfill", {"limit": settings.embedding_backfill_limit}, client.provider)
+
+
+async def run_embedding_backfills(interval: float) -> None:
+    """
+    Schedule an embedding backfill now and then every `interval` seconds
+    (once when 0). Embeddings that fail on the write path leave their task
+    without a vector, so this is also how they are retried.
+    """
+    while True:
+        try:
+            job_id = await run_in_threadpool(_schedule_embedding_backfill)
+        except Exception:  # noqa: BLE001
+            # e.g. the database is briefly unavailable; the next tick retries.
+            job_id = None
+        if job_id is not None:
+            job_queue.enqueue(job_id)
+        if interval <= 0:
+            return
+        await asyncio.sleep(interval)
+
+
+def _schedule_embedding_backfill() -> Optional[str]:
+    with SessionLocal() as db:
+        job = schedule_embedding_backfill(db, get_llm_client())
+        return job.id if job is not None else None
+
+
+class JobQueue:
+    """
+    Runs LLM-heavy jobs in the background on the app's event loop.
+
+    Job state lives in the `jobs` table; the bounded in-memory queue only
+    carries ids. A fixed number of workers pull ids, and a semaphore per
+    provider caps how many jobs talk to the same LLM provider at once.
+
+    A claimed job carries a lease (`claimed_by`, `heartbeat_at`) that this
+    process renews while the job runs. A maintenance pass, on start and every
+    `heartbeat_seconds`, renews those leases, requeues running jobs whose
+    lease expired (their worker died), and tops the in-memory queue up with
+    queued jobs from the table. Jobs a live sibling worker is running are
+    left alone.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        provider_concurrency: int,
+        max_size: int = 0,
+        lease_seconds: float = 60.0,
+        heartbeat_seconds: float = 10.0,
+    ) -> None:
+        self.workers = workers
+        self.provider_concurrency = provider_concurrency
+        self.max_size = max_size
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self._queue: asyncio.Queue[str] | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        # Ids waiting in `_queue`, and ids this process has claimed.
+        self._enqueued: set[str] = set()
+        self._claimed: set[str] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.full()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._semaphores = {}
+        self._enqueued = set()
+        self._claimed = set()
+        await self._maintain()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._maintenance_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def enqueue(self, job_id: str) -> bool:
+        """
+        Hand a queued job to the workers. Returns False when there is no room
+        (or no running queue); the job then stays queued in the database and
+        a later maintenance pass picks it up.
+        """
+        if self._queue is None or job_id in self._enqueued:
+            return False
+        try:
+            self._queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            return False
+        self._enqueued.add(job_id)
+        return True
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                await self._maintain()
+            except Exception:  # noqa: BLE001
+                # e.g. the database is briefly unavailable; the next tick retries.
+                continue
+
+    async def _maintain(self) -> None:
+        assert self._queue is not None
+        free = self._queue.maxsize - self._queue.qsize() if self._queue.maxsize else None
+        # Ids already waiting here come back too, so ask for enough extra.
+        limit = None if free is None else free + len(self._enqueued)
+        job_ids = await run_in_threadpool(_maintain_leases, list(self._claimed), self.lease_seconds, limit)
+        for job_id in job_ids:
+            if job_id not in self._enqueued and not self.enqueue(job_id):
+                break
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            job_id = await self._queue.get()
+            self._enqueued.discard(job_id)
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            job = await run_in_threadpool(_claim_job, db, job_id)
+            if job is None:
+                return
+            self._claimed.add(job_id)
+            semaphore = self._semaphores.setdefault(job.provider, asyncio.Semaphore(self.provider_concurrency))
+            try:
+                async with semaphore:
+                    result = await HANDLERS[job.kind](db, job.payload, get_llm_client())
+            except Exception as exc:  # noqa: BLE001
+                await run_in_threadpool(_finish_job, db, job_id, JobStatus.failed, None, str(exc) or type(exc).__name__)
+            else:
+                await run_in_threadpool(_finish_job, db, job_id, JobStatus.succeeded, jsonable_encoder(result), None)
+        finally:
+            self._claimed.discard(job_id)
+            db.close()
+
+
+def _maintain_leases(claimed: list[str], lease_seconds: float, limit: Optional[int]) -> list[str]:
+    """
+    Renew this worker's leases on `claimed`, requeue running jobs whose lease
+    expired, and return up to `limit` queued job ids, oldest first.
+    """
+    with SessionLocal() as db:
+        if claimed:
+            renew = update(Job).where(Job.id.in_(claimed), Job.claimed_by == WORKER_ID, Job.status == JobStatus.running)
+            db.execute(renew.values(heartbeat_at=func.now()))
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=lease_seconds)).replace(microsecond=0)
+        expired = or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < timestamp_param(db, cutoff))
+        db.execute(
+            update(Job)
+            .where(Job.status == JobStatus.running, expired)
+            .values(status=JobStatus.queued, claimed_by=None, heartbeat_at=None)
+        )
+        db.commit()
+        stmt = select(Job.id).where(Job.status == JobStatus.queued).order_by(Job.created_at)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return list(db.execute(stmt).scalars())
+
+
+def _claim_job(db: Session, job_id: str) -> Optional[Job]:
+    # Conditional UPDATE so a job is only ever claimed once.
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.queued)
+        .values(status=JobStatus.running, claimed_by=WORKER_ID, heartbeat_at=func.now())
+    ).rowcount
+    db.commit()
+    return db.get(Job, job_id) if claimed else None
+
+
+def _finish_job(db: Session, job_id: str, status: JobStatus, result: Any, error: Optional[str]) -> bool:
+    """
+    Record the outcome if this worker still holds the job's lease. Returns
+    False, discarding the outcome, when the lease expired and the job was
+    requeued or claimed by another worker in the meantime.
+    """
+    db.rollback()
+    finished = db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == JobStatus.running, Job.claimed_by == WORKER_ID)
+        .values(status=status, result=result, error=error)
+    ).rowcount
+    db.commit()
+    return bool(finished)
+
+
+job_queue = JobQueue(
+    workers=settings.job_workers,
+    provider_concurrency=settings.job_provider_concurrency,
+    max_size=settings.job_queue_max_size,
+    lease_seconds=settings.job_lease_seconds,
+    heartbeat_seconds=settings.job_heartbeat_seconds,
+)
@@ -0,0 +1,136 @@
+import heapq
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.config import settings
+from src.models.schemas import SearchMode, TaskSearchRequest
+from src.models.task import Task
+from src.services import embedding_service, task_service
+from src.utils import fts
+from src.utils.llm_client import LLMClient
+from src.utils.resilience import LLMError
+
+
+def semantic_search(db: Session, req: TaskSearchRequest, client: LLMClient) -> dict:
+    """
+    Rank every task matching the request's filters against the query.
+
+    - mode=semantic: cosine similarity against stored task embeddings. Only
+      the query is embedded per request; task vectors come from the
+      in-process index (see embedding_service). With filters, matching ids
+      are streamed from the database to restrict the index scan.
+    - mode=lexical: BM25 over the full-text index (title/description/tags).
+    - mode=hybrid: top-k candidates from both channels, merged with
+      reciprocal rank fusion.
+
+    Only the final top-k rows are loaded. Falls back to tag-overlap scoring
+    if no channel yields anything useful.
+    """
+    query_vec = None
+    if req.mode != SearchMode.lexical:
+        try:
+            query_vec = client.embed(req.query, strict=True)
+        except LLMError:
+            query_vec = None
+    return _search(db, req, client, query_vec)
+
+
+async def asemantic_search(db: Session, req: TaskSearchRequest, client: LLMClient) -> dict:
+    """
+    Async variant of semantic_search(): the query is embedded on the event
+    loop, database and index work runs in the threadpool.
+    """
+    query_vec = None
+    if req.mode != SearchMode.lexical:
+        try:
+            query_vec = await client.aembed(req.query, strict=True)
+        except LLMError:
+            query_vec = None
+    return await run_in_threadpool(_search, db, req, client, query_vec)
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = 60) -> list[tuple[int, float]]:
+    """
+    Merge ranked id lists: each id scores sum(1 / (k + rank)) over the lists
+    it appears in (rank starting at 1). Returns (id, score), best first.
+    """
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, task_id in enumerate(ranking, start=1):
+            scores[task_id] = scores.get(task_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def _search(db: Session, req: TaskSearchRequest, client: LLMClient, query_vec: list[float] | None) -> dict:
+    if req.mode == SearchMode.semantic:
+        hits = _vector_hits(db, req, client, query_vec, req.limit)
+        # If all scores are zero, embeddings likely failed silently; fall back.
+        if hits and all(score == 0.0 for _, score in hits):
+            hits = []
+    else:
+        per_channel = max(req.limit, settings.search_candidates_per_channel)
+        rankings = [[tid for tid, _ in _lexical_hits(db, req, per_channel)]]
+        if req.mode == SearchMode.hybrid:
+            rankings.append([tid for tid, _ in _vector_hits(db, req, client, query_vec, per_channel)])
+        hits = reciprocal_rank_fusion(rankings, k=settings.search_rrf_k)[: req.limit]
+
+    if not hits:
+        return {"results": _tag_overlap(db, req), "provider": client.info()}
+
+    tasks = task_service.get_tasks_by_ids(db, [tid for tid, _ in hits])
+    titles = {t.id: t.title for t in tasks}
+    for tid, _ in hits:
+        if tid not in titles:
+            # Deleted by another worker process; drop it from this one's index.
+            embedding_service.forget_task(tid)
+    results = [
+        {"task_id": tid, "title": titles[tid], "score": score}
+        for tid, score in hits
+        if tid in titles
+    ]
+    return {"results": results, "provider": client.info()}
+
+
+def _vector_hits(
+    db: Session,
+    req: TaskSearchRequest,
+    client: LLMClient,
+    query_vec: list[float] | None,
+    k: int,
+) -> list[tuple[int, float]]:
+    if query_vec is None:
+        return []
+    try:
+        index = embedding_service.refresh_index(db, client.embedding_model)
+
+        candidates = None
+        if req.status or req.priority or req.tag:
+            candidates = task_service.iter_task_ids(db, req.status, req.priority, req.tag)
+        return index.search(query_vec, k, candidate_ids=candidates)
+    except Exception:  # noqa: BLE001
+        return []
+
+
+def _lexical_hits(db: Session, req: TaskSearchRequest, k: int) -> list[tuple[int, float]]:
+    stmt = task_service.apply_task_filters(select(Task.id), req.status, req.priority, req.tag)
+    # Any query word may match: the fused ranking rewards tasks matching more.
+    stmt = fts.apply_search(db, stmt, req.query, match_any=True).limit(k)
+    return [(task_id, 0.0) for task_id in db.execute(stmt).scalars()]
+
+
+def _tag_overlap(db: Session, req: TaskSearchRequest) -> list[dict]:
+    # Original lexical/tag overlap scoring, streamed over the filtered table.
+    query_terms = set(req.query.lower().split())
+    stmt = task_service.apply_task_filters(
+        select(Task.id, Task.title, Task.tags), req.status, req.priority, req.tag
+    )
+    rows = db.execute(stmt.execution_options(yield_per=1000))
+
+    def _scored():
+        for task_id, title, tags in rows:
+            tag_terms = set(tag.lower() for tag in (tags or []))
+            yield {"task_id": task_id, "title": title, "score": float(len(query_terms & tag_terms))}
+
+    return heapq.nlargest(req.limit, _scored(), key=lambda x: x["score"])
@@ -0,0 +1,149 @@
+import uuid
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from src.config import settings
+from src.utils.cache import CacheBackend, LRUCache, SQLiteCache, TieredCache, make_key
+from src.utils.metrics import REGISTRY
+
+
+# A cached list page: (JSON body, next cursor).
+ListPage = tuple[str, Optional[str]]
+
+
+class TaskCache:
+    """
+    Read-through cache of serialized task responses (single tasks and list
+    pages), invalidated with version stamps.
+
+    Every entry key includes a version: one per task for GET /tasks/{id},
+    and one shared by all list queries, since any write can change any
+    page. Writes bump the relevant versions instead of deleting entries, so
+    stale entries simply become unreachable and age out of the LRU. The
+    version is read before the database load, so a page loaded concurrently
+    with a write is stored under the old version and never served.
+
+    Versions live in `shared` when given (e.g. a cache every worker
+    process talks to), otherwise in `local`. Versioned entries never
+    change, so they are also kept in `local` as a first tier. Without
+    `shared`, writes made by other processes are not seen, so a local-only
+    cache is only safe with a single worker process.
+
+    The async methods hand every `shared` round trip to a worker thread, so
+    a disk- or network-backed cache does not block the event loop.
+    """
+
+    def __init__(self, local: LRUCache, shared: CacheBackend | None = None, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self.local = local
+        self.shared = shared
+        self.versions: CacheBackend = shared if shared is not None else local
+        self.entries: CacheBackend = TieredCache(local, shared)
+
+    def get_task(self, task_id: int, load: Callable[[], Optional[str]]) -> Optional[str]:
+        if not self.enabled:
+            return load()
+        return self._read_through(self._task_key(task_id), load)
+
+    async def aget_task(self, task_id: int, load: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        if not self.enabled:
+            return await load()
+        key, cached = await self._offload(self._lookup, self._task_key, task_id)
+        return cached if cached is not None else await self._offload(self._store, key, await load())
+
+    def list_tasks(self, params: dict[str, Any], load: Callable[[], ListPage]) -> ListPage:
+        if not self.enabled:
+            return load()
+        return _as_page(self._read_through(self._list_key(params), load))
+
+    async def alist_tasks(self, params: dict[str, Any], load: Callable[[], Awaitable[ListPage]]) -> ListPage:
+        if not self.enabled:
+            return await load()
+        key, cached = await self._offload(self._lookup, self._list_key, params)
+        return _as_page(cached if cached is not None else await self._offload(self._store, key, await load()))
+
+    def invalidate(self, task_ids: Iterable[int] = ()) -> None:
+        """Bump the list version and the versions of `task_ids` (call after commit)."""
+        if not self.enabled:
+            return
+        for task_id in task_ids:
+            self._bump(f"task:{task_id}")
+        self._bump("tasks")
+
+    async def ainvalidate(self, task_ids: Iterable[int] = ()) -> None:
+        """invalidate() for async callers."""
+        if not self.enabled:
+            return
+        await self._offload(self.invalidate, list(task_ids))
+
+    def _task_key(self, task_id: int) -> str:
+        return make_key("task", task_id, self._version(f"task:{task_id}"))
+
+    def _list_key(self, params: dict[str, Any]) -> str:
+        return make_key("tasks", params, self._version("tasks"))
+
+    def _lookup(self, make: Callable[[Any], str], arg: Any) -> tuple[str, Any]:
+        key = make(arg)
+        return key, self.entries.get(key)
+
+    async def _offload(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # The in-memory tier alone never blocks, so skip the thread hop.
+        if self.shared is None:
+            return fn(*args)
+        return await run_in_threadpool(fn, *args)
+
+    def _read_through(self, key: str, load: Callable[[], Any]) -> Any:
+        cached = self.entries.get(key)
+        return cached if cached is not None else self._store(key, load())
+
+    def _store(self, key: str, value: Any) -> Any:
+        if value is not None:
+            self.entries.set(key, value)
+        return value
+
+    def _version(self, name: str) -> str:
+        # A missing stamp (never set, or evicted) gets a fresh one rather than
+        # a default, so entries written under an older stamp stay unreachable.
+        version = self.versions.get(f"version:{name}")
+        if version is None:
+            version = self._bump(name)
+        return version
+
+    def _bump(self, name: str) -> str:
+        # Random tokens instead of counters: no read-modify-write, so
+        # concurrent bumps from several processes cannot collide.
+        version = uuid.uuid4().hex
+        self.versions.set(f"version:{name}", version)
+        return version
+
+    def stats(self) -> dict[str, int]:
+        return self.entries.stats()
+
+
+def _as_page(value: Any) -> ListPage:
+    # JSON-backed caches hand the pair back as a list.
+    body, next_cursor = value
+    return body, next_cursor
+
+
+def _build_task_cache() -> TaskCache:
+    local = LRUCache(max_entries=settings.task_cache_max_entries, ttl_seconds=settings.task_cache_ttl_seconds)
+    shared = SQLiteCache(settings.task_cache_path, ttl_seconds=settings.task_cache_ttl_seconds) if settings.task_cache_path else None
+    # A cache private to each worker process would keep serving pages another
+    # worker's writes made stale, so by default it is only on when shared.
+    enabled = settings.task_cache_enabled if settings.task_cache_enabled is not None else shared is not None
+    return TaskCache(local, shared, enabled=enabled)
+
+
+task_cache = _build_task_cache()
+
+
+def _collect_task_cache_stats() -> list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]:
+    stats = task_cache.stats()
+    samples = [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]
+    return [("task_cache_requests_total", "counter", "Task response cache lookups by result.", samples)]
+
+
+REGISTRY.register_collector(_collect_task_cache_stats)
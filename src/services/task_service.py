@@ -1,58 +1,335 @@
+import base64
+import json
+from collections.abc import Iterator
+from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import or_, select
+from sqlalchemy import Select, delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.models.schemas import TaskCreate, TaskQueryParams, TaskUpdate
-from src.models.task import Task
+from src.models.embedding import TaskEmbedding
+from src.models.schemas import TagMatchMode, TaskCreate, TaskQueryParams, TaskUpdate
+from src.models.task import Task, TaskPriority, TaskStatus, TaskTag
+from src.services.task_cache import task_cache
+from src.utils import fts
+from src.utils.db import timestamp_param
 
 
 def create_task(db: Session, payload: TaskCreate) -> Task:
-    task = Task(**payload.model_dump())
-    db.add(task)
+    """
+    Insert one task. Server-generated id and timestamps come back through
+    INSERT ... RETURNING, so no follow-up SELECT is needed after commit.
+    """
+    task = _insert_task(db, payload)
+    task_cache.invalidate()
+    return task
+
+
+def _insert_task(db: Session, payload: TaskCreate) -> Task:
+    if db.get_bind().dialect.insert_returning:
+        task = db.execute(insert(Task).values(**payload.model_dump()).returning(Task)).scalar_one()
+    else:
+        task = Task(**payload.model_dump())
+        db.add(task)
+        db.flush()
+        db.refresh(task)
+    _write_tags(db, [task])
     db.commit()
-    db.refresh(task)
     return task
 
 
+def apply_task_filters(
+    stmt: Select,
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    tag: Optional[str] = None,
+    tags: Optional[list[str]] = None,
+    tag_mode: TagMatchMode = TagMatchMode.all,
+) -> Select:
+    """
+    Restrict `stmt` (a select over Task columns) by status, priority and tags.
+
+    `tag` and `tags` are combined; with tag_mode=all a task must carry every
+    tag, with tag_mode=any at least one. Tag filters go through the indexed
+    task_tags table.
+    """
+    if status:
+        stmt = stmt.where(Task.status == status)
+    if priority:
+        stmt = stmt.where(Task.priority == priority)
+
+    wanted = list(dict.fromkeys(([tag] if tag else []) + (tags or [])))
+    if len(wanted) == 1:
+        stmt = stmt.where(Task.id.in_(select(TaskTag.task_id).where(TaskTag.tag == wanted[0])))
+    elif wanted:
+        matching = select(TaskTag.task_id).where(TaskTag.tag.in_(wanted))
+        if tag_mode == TagMatchMode.all:
+            matching = matching.group_by(TaskTag.task_id).having(func.count() == len(wanted))
+        stmt = stmt.where(Task.id.in_(matching))
+    return stmt
+
+
 def list_tasks(db: Session, params: TaskQueryParams) -> list[Task]:
-    stmt = select(Task)
-
-    if params.status:
-        stmt = stmt.where(Task.status == params.status)
-    if params.priority:
-        stmt = stmt.where(Task.priority == params.priority)
-    if params.tag:
-        stmt = stmt.where(Task.tags.contains([params.tag]))
+    return list(db.execute(build_list_query(db, params)).scalars().all())
+
+
+def build_list_query(db: Session, params: TaskQueryParams) -> Select:
+    """
+    The SELECT behind list_tasks. Results are always fully ordered: by
+    (created_at, id), or by (relevance, id) when searching (just id on
+    backends without a full-text index), so pages never overlap or skip rows.
+    """
+    stmt = apply_task_filters(
+        select(Task), params.status, params.priority, params.tag, params.tag_list(), params.tag_mode
+    )
+
     if params.search:
-        pattern = f"%{params.search}%"
-        stmt = stmt.where(or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+        # Relevance-ranked; keyset cursors only apply to the (created_at, id) order.
+        if params.cursor:
+            raise ValueError("Cursor paging is not supported together with search; use offset.")
+        # apply_search() orders by relevance; order_by() appends id as the tiebreaker.
+        stmt = fts.apply_search(db, stmt, params.search)
+        return stmt.order_by(Task.id).offset(params.offset).limit(params.limit)
+
+    sort_key = tuple_(Task.created_at, Task.id)
+    if params.cursor:
+        created_at, last_id = decode_cursor(params.cursor, params.descending)
+        bound = tuple_(timestamp_param(db, created_at), last_id)
+        stmt = stmt.where(sort_key < bound if params.descending else sort_key > bound)
+    else:
+        stmt = stmt.offset(params.offset)
+
+    if params.descending:
+        stmt = stmt.order_by(Task.created_at.desc(), Task.id.desc())
+    else:
+        stmt = stmt.order_by(Task.created_at, Task.id)
+    return stmt.limit(params.limit)
+
+
+# Async variants for AsyncSession callers (DB_ASYNC=true). They share the ORM
+# code above through run_sync, which runs it on the async connection without
+# blocking the event loop. Cache invalidation stays outside run_sync so a
+# shared task cache is written from a worker thread, not from the loop.
+
+
+async def acreate_task(db: AsyncSession, payload: TaskCreate) -> Task:
+    task = await db.run_sync(_insert_task, payload)
+    await task_cache.ainvalidate()
+    return task
+
+
+async def alist_tasks(db: AsyncSession, params: TaskQueryParams) -> list[Task]:
+    return await db.run_sync(list_tasks, params)
+
+
+async def aget_task(db: AsyncSession, task_id: int) -> Optional[Task]:
+    return await db.get(Task, task_id)
+
+
+async def aupdate_task(db: AsyncSession, task_id: int, payload: TaskUpdate) -> Optional[Task]:
+    task = await db.run_sync(_update_task, task_id, payload)
+    if task is not None:
+        await task_cache.ainvalidate([task_id])
+    return task
+
+
+async def adelete_task(db: AsyncSession, task_id: int) -> bool:
+    deleted = await db.run_sync(_delete_task, task_id)
+    if deleted:
+        await task_cache.ainvalidate([task_id])
+    return deleted
+
 
-    stmt = stmt.offset(params.offset).limit(params.limit)
-    return list(db.execute(stmt).scalars().all())
+def encode_cursor(task: Task, descending: bool = False) -> str:
+    """Opaque keyset cursor pointing just after `task` in list order."""
+    raw = json.dumps({"c": task.created_at.isoformat(), "i": task.id, "d": descending})
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, descending: bool = False) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at, last_id, cursor_desc = datetime.fromisoformat(data["c"]), int(data["i"]), bool(data["d"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid pagination cursor.") from exc
+    if cursor_desc != descending:
+        raise ValueError("Cursor was issued for a different sort order.")
+    return created_at, last_id
+
+
+def iter_task_ids(
+    db: Session,
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    tag: Optional[str] = None,
+    chunk_size: int = 5000,
+) -> Iterator[int]:
+    """Stream matching task ids without loading ORM rows."""
+    stmt = apply_task_filters(select(Task.id), status, priority, tag)
+    yield from db.execute(stmt.execution_options(yield_per=chunk_size)).scalars()
+
+
+def iter_tasks(
+    db: Session,
+    status: Optional[TaskStatus] = None,
+    priority: Optional[TaskPriority] = None,
+    tag: Optional[str] = None,
+    chunk_size: int = 1000,
+) -> Iterator[Task]:
+    """Stream matching tasks in id order, `chunk_size` rows at a time."""
+    stmt = apply_task_filters(select(Task), status, priority, tag).order_by(Task.id)
+    yield from db.execute(stmt.execution_options(yield_per=chunk_size)).scalars()
 
 
 def get_task(db: Session, task_id: int) -> Optional[Task]:
     return db.get(Task, task_id)
 
 
+def get_tasks_by_ids(db: Session, task_ids: list[int]) -> list[Task]:
+    """Load tasks by id, returned in the order of `task_ids` (missing ids skipped)."""
+    if not task_ids:
+        return []
+    rows = db.execute(select(Task).where(Task.id.in_(task_ids))).scalars()
+    by_id = {t.id: t for t in rows}
+    return [by_id[tid] for tid in task_ids if tid in by_id]
+
+
 def update_task(db: Session, task_id: int, payload: TaskUpdate) -> Optional[Task]:
-    task = get_task(db, task_id)
-    if not task:
-        return None
+    """
+    Apply a partial update as a single UPDATE ... RETURNING, without loading
+    the row first. Returns None when the task does not exist.
+    """
+    task = _update_task(db, task_id, payload)
+    if task is not None:
+        task_cache.invalidate([task_id])
+    return task
+
 
-    for key, value in payload.model_dump(exclude_unset=True).items():
-        setattr(task, key, value)
+def _update_task(db: Session, task_id: int, payload: TaskUpdate) -> Optional[Task]:
+    changes = payload.model_dump(exclude_unset=True)
+    if not changes:
+        return get_task(db, task_id)
 
+    if db.get_bind().dialect.update_returning:
+        stmt = update(Task).where(Task.id == task_id).values(**changes).returning(Task)
+        task = db.execute(stmt).scalar_one_or_none()
+    else:
+        task = get_task(db, task_id)
+        if task is not None:
+            for key, value in changes.items():
+                setattr(task, key, value)
+            db.flush()
+            db.refresh(task)
+    if task is None:
+        db.rollback()
+        return None
+    if "tags" in changes:
+        _write_tags(db, [task], replace=True)
     db.commit()
-    db.refresh(task)
     return task
 
 
+def bulk_create_tasks(db: Session, payloads: list[TaskCreate], chunk_size: int = 500, commit_per_chunk: bool = False) -> list[Task]:
+    """
+    Insert many tasks with batched INSERTs, returning them in input order.
+
+    Everything is written in one transaction unless `commit_per_chunk` is
+    set, in which case each chunk of `chunk_size` rows is committed on its own.
+    """
+    tasks = [Task(**payload.model_dump()) for payload in payloads]
+    for start in range(0, len(tasks), chunk_size):
+        chunk = tasks[start : start + chunk_size]
+        db.add_all(chunk)
+        db.flush()
+        _write_tags(db, chunk)
+        if commit_per_chunk:
+            db.commit()
+    db.commit()
+    task_cache.invalidate()
+    return tasks
+
+
+def bulk_update_tasks(
+    db: Session,
+    updates: list[tuple[int, TaskUpdate]],
+    chunk_size: int = 500,
+    commit_per_chunk: bool = False,
+) -> dict[int, Task]:
+    """
+    Apply partial updates to many tasks, loading each chunk with one SELECT.
+
+    Returns the updated tasks keyed by id; ids that do not exist are absent.
+    """
+    updated: dict[int, Task] = {}
+    for start in range(0, len(updates), chunk_size):
+        chunk = updates[start : start + chunk_size]
+        stmt = select(Task).where(Task.id.in_([task_id for task_id, _ in chunk]))
+        found = {t.id: t for t in db.execute(stmt).scalars()}
+        retagged: list[Task] = []
+        for task_id, payload in chunk:
+            task = found.get(task_id)
+            if task is None:
+                continue
+            changes = payload.model_dump(exclude_unset=True)
+            for key, value in changes.items():
+                setattr(task, key, value)
+            if "tags" in changes:
+                retagged.append(task)
+            updated[task_id] = task
+        db.flush()
+        _write_tags(db, retagged, replace=True)
+        if commit_per_chunk:
+            db.commit()
+    db.commit()
+    task_cache.invalidate(updated)
+    return updated
+
+
+def bulk_delete_tasks(db: Session, task_ids: list[int], chunk_size: int = 500, commit_per_chunk: bool = False) -> set[int]:
+    """Delete many tasks; returns the ids that existed and were deleted."""
+    deleted: set[int] = set()
+    for start in range(0, len(task_ids), chunk_size):
+        chunk = task_ids[start : start + chunk_size]
+        existing = set(db.execute(select(Task.id).where(Task.id.in_(chunk))).scalars())
+        if existing:
+            db.execute(delete(TaskEmbedding).where(TaskEmbedding.task_id.in_(existing)))
+            db.execute(delete(TaskTag).where(TaskTag.task_id.in_(existing)))
+            db.execute(delete(Task).where(Task.id.in_(existing)))
+            deleted |= existing
+        if commit_per_chunk:
+            db.commit()
+    db.commit()
+    task_cache.invalidate(deleted)
+    return deleted
+
+
 def delete_task(db: Session, task_id: int) -> bool:
-    task = get_task(db, task_id)
-    if not task:
+    deleted = _delete_task(db, task_id)
+    if deleted:
+        task_cache.invalidate([task_id])
+    return deleted
+
+
+def _delete_task(db: Session, task_id: int) -> bool:
+    # SQLite does not enforce ON DELETE CASCADE unless foreign keys are enabled.
+    db.execute(delete(TaskEmbedding).where(TaskEmbedding.task_id == task_id))
+    db.execute(delete(TaskTag).where(TaskTag.task_id == task_id))
+    deleted = db.execute(delete(Task).where(Task.id == task_id)).rowcount > 0
+    if not deleted:
+        db.rollback()
         return False
-    db.delete(task)
     db.commit()
     return True
+
+
+def _write_tags(db: Session, tasks: list[Task], replace: bool = False) -> None:
+    """Mirror Task.tags into task_tags for flushed tasks. Caller commits."""
+    if not tasks:
+        return
+    if replace:
+        db.execute(delete(TaskTag).where(TaskTag.task_id.in_([t.id for t in tasks])))
+    rows = [{"task_id": t.id, "tag": tag} for t in tasks for tag in dict.fromkeys(t.tags or [])]
+    if rows:
+        db.execute(insert(TaskTag), rows)
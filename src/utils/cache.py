@@ -0,0 +1,172 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+
+def make_key(*parts: Any) -> str:
+    """Stable hex digest over JSON-serializable key parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU with optional per-entry TTL.
+
+    `None` is not a cacheable value; get() returns None on a miss.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float | None = None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._data)}
+
+
+class SQLiteCache:
+    """
+    On-disk cache in a single SQLite table; values are stored as JSON.
+
+    Survives restarts and can be shared by several worker processes on the
+    same host.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float | None = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                value, expires_at = row
+                if expires_at is None or expires_at > time.time():
+                    self.hits += 1
+                    return json.loads(value)
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl_seconds if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def purge_expired(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class TieredCache:
+    """
+    Read-through over a fast primary cache and an optional slower secondary
+    one. Secondary hits are copied into the primary.
+    """
+
+    def __init__(self, primary: CacheBackend, secondary: CacheBackend | None = None) -> None:
+        self.primary = primary
+        self.secondary = secondary
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Any | None:
+        value = self.primary.get(key)
+        if value is None and self.secondary is not None:
+            value = self.secondary.get(key)
+            if value is not None:
+                self.primary.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        self.primary.set(key, value, ttl)
+        if self.secondary is not None:
+            self.secondary.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self.primary.delete(key)
+        if self.secondary is not None:
+            self.secondary.delete(key)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
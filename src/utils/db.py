@@ -1,14 +1,110 @@
-from collections.abc import Generator
+import time
+from collections.abc import AsyncGenerator, Generator
+from datetime import datetime
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import URL, Engine, String, create_engine, event, make_url, type_coerce
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from src.config import settings
 from src.models.base import Base
+from src.utils.metrics import db_query_duration
 
 
-engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+def timestamp_param(db: Session, value: datetime) -> Any:
+    """`value` bound for comparison against a server-default timestamp column."""
+    # SQLite keeps timestamps as text: CURRENT_TIMESTAMP writes
+    # "YYYY-MM-DD HH:MM:SS" while a bound datetime renders with microseconds,
+    # which would compare unequal to the same instant. Bind the stored form.
+    if db.get_bind().dialect.name == "sqlite":
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+        return type_coerce(value.strftime(fmt), String)
+    return value
+
+
+def _is_sqlite_file(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def engine_options(url: URL) -> dict[str, Any]:
+    """
+    create_engine() keyword arguments for the backend behind `url`.
+
+    Postgres gets a sized pool that recycles connections instead of pinging
+    on every checkout; with the psycopg (v3) driver, statements run more
+    than DB_PREPARE_THRESHOLD times become server-side prepared statements.
+    SQLite is tuned per connection instead (see _apply_sqlite_pragmas).
+    """
+    options: dict[str, Any] = {"future": True, "pool_pre_ping": settings.db_pool_pre_ping}
+    if url.get_backend_name() == "postgresql":
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle_seconds,
+            pool_timeout=settings.db_pool_timeout_seconds,
+            pool_use_lifo=True,
+        )
+        if url.get_driver_name() == "psycopg":
+            options["connect_args"] = {"prepare_threshold": settings.db_prepare_threshold}
+    return options
+
+
+def _apply_sqlite_pragmas(engine: Engine, read_only: bool) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        cursor = dbapi_connection.cursor()
+        if not read_only:
+            # WAL lets readers run alongside the single writer; the setting
+            # is stored in the database file.
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def _create_engines() -> tuple[Engine, Engine]:
+    url = make_url(settings.database_url)
+    write_engine = create_engine(url, **engine_options(url))
+    if not _is_sqlite_file(url):
+        # Postgres serves reads from the same pool; in-memory SQLite has a
+        # single database per connection, so it cannot have a second pool.
+        return write_engine, write_engine
+    _apply_sqlite_pragmas(write_engine, read_only=False)
+    # Separate pool of query_only connections for read endpoints, so reads
+    # never queue behind writers for a connection.
+    read_engine = create_engine(url, **engine_options(url))
+    _apply_sqlite_pragmas(read_engine, read_only=True)
+    return write_engine, read_engine
+
+
+engine, read_engine = _create_engines()
+# Objects stay readable after commit so write paths can serialize them
+# without a refresh round-trip per row.
+SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+
+
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _observe_query(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    started = getattr(context, "_query_started", None)
+    if started is not None:
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement else "UNKNOWN"
+        db_query_duration.observe(time.perf_counter() - started, operation)
+
+
+for _engine in {engine, read_engine}:
+    event.listen(_engine, "before_cursor_execute", _start_query_timer)
+    event.listen(_engine, "after_cursor_execute", _observe_query)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -19,5 +115,62 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def async_database_url(url: URL) -> URL:
+    """`url` with its async driver: aiosqlite for SQLite, asyncpg for Postgres."""
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+_async_engine: AsyncEngine | None = None
+_async_sessionmaker: async_sessionmaker[AsyncSession] | None = None
+
+
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """
+    Session factory for the async stack (DB_ASYNC=true), created on first use
+    so the async drivers are only needed when it is enabled. asyncpg keeps
+    its own prepared statement cache per connection.
+    """
+    global _async_engine, _async_sessionmaker
+    if _async_sessionmaker is None:
+        url = async_database_url(make_url(settings.async_database_url or settings.database_url))
+        _async_engine = create_async_engine(url, **engine_options(url))
+        if _is_sqlite_file(url):
+            _apply_sqlite_pragmas(_async_engine.sync_engine, read_only=False)
+        event.listen(_async_engine.sync_engine, "before_cursor_execute", _start_query_timer)
+        event.listen(_async_engine.sync_engine, "after_cursor_execute", _observe_query)
+        _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_sessionmaker = None
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Like get_db(), for endpoints that only read (read-only pool on SQLite)."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db() -> None:
+    from src.utils.migrations import run_migrations
+
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
@@ -0,0 +1,126 @@
+import re
+
+from sqlalchemy import Select, column, func, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from src.models.task import Task
+
+
+# Full-text index over title, description and tags.
+#
+# SQLite: an external-content FTS5 table kept in sync by triggers, so every
+# write path (ORM, bulk Core statements, raw SQL) updates it. Tags are indexed
+# from their JSON text; the tokenizer drops the brackets and quotes.
+# Postgres: a GIN index over the same tsvector expression used by queries.
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, description, tags,
+        content='tasks', content_rowid='id', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description, tags ON tasks BEGIN
+        INSERT INTO tasks_fts(tasks_fts, rowid, title, description, tags)
+        VALUES ('delete', old.id, old.title, old.description, old.tags);
+        INSERT INTO tasks_fts(rowid, title, description, tags)
+        VALUES (new.id, new.title, new.description, new.tags);
+    END
+    """,
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+]
+
+_PG_DOCUMENT = "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(tags::text, ''))"
+_PG_DDL = [f"CREATE INDEX IF NOT EXISTS ix_tasks_fts ON tasks USING GIN ({_PG_DOCUMENT})"]
+
+_tasks_fts = table("tasks_fts", column("rowid"), column("rank"), column("tasks_fts"))
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# database URL -> whether the full-text index exists there
+_available: dict[str, bool] = {}
+
+
+class FullTextUnavailableError(RuntimeError):
+    """The database cannot host the full-text index (SQLite built without FTS5)."""
+
+
+def create_index(conn: Connection) -> None:
+    """
+    Create the full-text index for the connection's backend (no-op on
+    backends other than SQLite and Postgres). Raises
+    FullTextUnavailableError when SQLite lacks FTS5.
+    """
+    dialect = conn.dialect.name
+    statements = _SQLITE_DDL if dialect == "sqlite" else _PG_DDL if dialect == "postgresql" else []
+    if dialect == "sqlite" and not _has_fts5(conn):
+        raise FullTextUnavailableError("SQLite was built without FTS5; task search falls back to ILIKE")
+    for statement in statements:
+        conn.execute(text(statement))
+    _available.pop(str(conn.engine.url), None)
+
+
+def _has_fts5(conn: Connection) -> bool:
+    try:
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.exec_driver_sql("DROP TABLE temp.fts5_probe")
+    except Exception:  # noqa: BLE001
+        return False
+    return True
+
+
+def apply_search(db: Session, stmt: Select, term: str, match_any: bool = False) -> Select:
+    """
+    Restrict `stmt` (a select over Task) to rows matching `term` and order it
+    by relevance (BM25 on SQLite, ts_rank on Postgres).
+
+    Every word in `term` must match (or any word, with match_any), each as a
+    prefix. Falls back to the old unranked ILIKE scan when no full-text index
+    is available.
+    """
+    tokens = _TOKEN_RE.findall(term)
+    dialect = db.get_bind().dialect.name
+    if not tokens or not is_available(db):
+        pattern = f"%{term}%"
+        return stmt.where(or_(Task.title.ilike(pattern), Task.description.ilike(pattern)))
+
+    if dialect == "sqlite":
+        query = (" OR " if match_any else " ").join(f'"{token}"*' for token in tokens)
+        matches = (
+            select(_tasks_fts.c.rowid, _tasks_fts.c.rank)
+            .where(_tasks_fts.c.tasks_fts.op("MATCH")(query))
+            .subquery()
+        )
+        # FTS5 rank is bm25(): lower is better.
+        return stmt.join(matches, matches.c.rowid == Task.id).order_by(matches.c.rank)
+
+    document = literal_column(_PG_DOCUMENT)
+    query = func.to_tsquery("simple", (" | " if match_any else " & ").join(f"{token}:*" for token in tokens))
+    return stmt.where(document.op("@@")(query)).order_by(func.ts_rank(document, query).desc())
+
+
+def is_available(db: Session) -> bool:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _available:
+        dialect = bind.dialect.name
+        if dialect == "sqlite":
+            found = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'")
+            ).first()
+            _available[key] = found is not None
+        else:
+            _available[key] = dialect == "postgresql"
+    return _available[key]
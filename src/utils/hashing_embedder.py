@@ -0,0 +1,73 @@
+import re
+import zlib
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbedder:
+    """
+    Offline, deterministic text embeddings using the hashing trick.
+
+    Each text is broken into word unigrams, word bigrams and character
+    trigrams of each word (so "deploy" and "deployment" overlap). Every
+    feature is hashed with CRC32 into one of `dim` buckets with a +/-1 sign,
+    counts are log-scaled, and the vector is L2-normalized. Texts sharing
+    vocabulary get high cosine similarity; unrelated texts land near zero.
+
+    CPU-only, no model files, no network. CRC32 is used instead of hash()
+    because the latter is salted per process.
+    """
+
+    # Feature weights: whole words dominate, sub-word overlap is a hint.
+    _WORD = 1.0
+    _BIGRAM = 0.7
+    _CHARGRAM = 0.3
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+
+    @property
+    def model_name(self) -> str:
+        # Stored vectors are keyed by model name; the dimension is part of it.
+        return f"local-hash-{self.dim}"
+
+    def embed(self, text: str) -> list[float]:
+        return self.embed_batch([text])[0].tolist()
+
+    def embed_many(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_batch(texts).tolist()
+
+    def embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Return a (len(texts), dim) float32 matrix of unit vectors (zero rows for empty texts)."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes, weights = self._features(text)
+            if not hashes:
+                continue
+            h = np.fromiter(hashes, dtype=np.uint32, count=len(hashes))
+            signs = np.where(h & 0x80000000, -1.0, 1.0)
+            counts = np.bincount(h % self.dim, weights=signs * np.asarray(weights), minlength=self.dim)
+            vector = np.sign(counts) * np.log1p(np.abs(counts))
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                out[row] = vector / norm
+        return out
+
+    def _features(self, text: str) -> tuple[list[int], list[float]]:
+        tokens = _TOKEN_RE.findall(text.lower())
+        hashes: list[int] = []
+        weights: list[float] = []
+        for i, token in enumerate(tokens):
+            hashes.append(zlib.crc32(token.encode("utf-8")))
+            weights.append(self._WORD)
+            if i:
+                hashes.append(zlib.crc32(f"{tokens[i - 1]} {token}".encode("utf-8")))
+                weights.append(self._BIGRAM)
+            padded = f"#{token}#"
+            for j in range(len(padded) - 2):
+                hashes.append(zlib.crc32(f"c:{padded[j:j + 3]}".encode("utf-8")))
+                weights.append(self._CHARGRAM)
+        return hashes, weights
@@ -1,72 +1,189 @@
-from typing import Any
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any, TypeVar
 
 import httpx
 
+from src.config import settings
+from src.utils.cache import CacheBackend, LRUCache, SQLiteCache, TieredCache, make_key
+from src.utils.hashing_embedder import HashingEmbedder
+from src.utils.metrics import REGISTRY, llm_request_duration, llm_tokens
+from src.utils.resilience import CircuitBreaker, LLMError, RateLimiter, backoff_delay, is_retryable
+from src.utils.singleflight import SingleFlight
+
+T = TypeVar("T")
+
+
+# provider -> (chat completions URL, model)
+_CHAT_ENDPOINTS: dict[str, tuple[str, str]] = {
+    "openai": ("https://api.openai.com/v1/chat/completions", "gpt-4o-mini"),
+    "qwen": ("https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions", "qwen-plus"),
+}
+
+# provider -> (embeddings URL, model, max inputs per request)
+_EMBEDDING_ENDPOINTS: dict[str, tuple[str, str, int]] = {
+    "openai": ("https://api.openai.com/v1/embeddings", "text-embedding-3-small", 2048),
+    "qwen": ("https://dashscope.aliyuncs.com/compatible-mode/v1/embeddings", "text-embedding-v1", 25),
+}
+
 
 class LLMClient:
     """
     Thin abstraction over an LLM provider.
 
-    - For provider == 'openai' and an API key is set, uses the OpenAI chat
-      completions endpoint.
-    - Otherwise falls back to a local stub for easy testing.
+    - For provider == 'openai' (or 'qwen') and an API key is set, uses the
+      provider's chat completions / embeddings endpoints.
+    - Otherwise falls back to a local stub for easy testing (completions)
+      and a local hashing embedder (embeddings).
+
+    HTTP calls go through long-lived httpx clients (one sync, one async) with
+    keep-alive pooling and HTTP/2, created on first use. Build one LLMClient
+    per process (see get_llm_client) and close it on shutdown.
+
+    When a `cache` is given, successful completions and embeddings are cached
+    by provider, model, temperature and a hash of the input. Concurrent
+    identical calls that miss the cache share one upstream request (see
+    `inflight`).
+
+    Every provider request passes through a per-client rate limiter
+    (LLM_RPM / LLM_TPM), is retried with jittered exponential backoff on
+    429, 5xx and transport errors, and is guarded by a circuit breaker. A
+    call that still fails raises LLMError (CircuitOpenError while the
+    circuit is open), so callers can fall back to their heuristics.
     """
 
-    def __init__(self, provider: str, api_key: str | None = None) -> None:
+    def __init__(
+        self,
+        provider: str,
+        api_key: str | None = None,
+        http_client: httpx.Client | None = None,
+        async_http_client: httpx.AsyncClient | None = None,
+        cache: CacheBackend | None = None,
+        limiter: RateLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        local_embedder: HashingEmbedder | None = None,
+    ) -> None:
         self.provider = provider
         self.api_key = api_key
+        self.cache = cache
+        # Followers of a stuck call give up once the leader is past its
+        # worst case, so a slow provider does not trigger duplicate calls.
+        self.inflight = SingleFlight(wait_timeout=_retry_budget_seconds())
+        self.limiter = limiter or RateLimiter(rpm=settings.llm_rpm, tpm=settings.llm_tpm)
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            reset_seconds=settings.llm_breaker_reset_seconds,
+        )
+        self.max_retries = settings.llm_max_retries
+        self.local_embedder = local_embedder or HashingEmbedder(dim=settings.local_embedding_dim)
+        self._http = http_client
+        self._async_http = async_http_client
 
     def generate(self, prompt: str) -> str:
         """
         Generate a completion for the given prompt.
+
+        Raises LLMError if the provider call fails.
         """
-        if self.provider == "openai" and self.api_key:
-            try:
-                resp = httpx.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "gpt-4o-mini",
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.1,
-                    },
-                    timeout=15.0,
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                return data["choices"][0]["message"]["content"]
-            except Exception as exc:  # noqa: BLE001
-                # Fall back to a stubbed response but include error info.
-                return f"[openai error] {exc}"
-
-        if self.provider == "qwen" and self.api_key:
-            try:
-                resp = httpx.post(
-                    "https://dashscope.aliyuncs.com/compatible-mode/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "qwen-plus",
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.1,
-                    },
-                    timeout=15.0,
-                )
-                resp.raise_for_status()
-                data = resp.json()
-                return data["choices"][0]["message"]["content"]
-            except Exception as exc:  # noqa: BLE001
-                return f"[qwen error] {exc}"
+        request = self._chat_request(prompt)
+        if request is None:
+            # Default stub behaviour (for 'stub' or missing key)
+            return f"[{self.provider} stub] {prompt}"
+        key = self._generate_key(request[1], prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        return self.inflight.do(
+            key, lambda: self._call("chat", lambda: self._post_chat(key, *request), estimate_tokens(prompt))
+        )
 
-        # Default stub behaviour (for 'stub' or missing key)
-        return f"[{self.provider} stub] {prompt}"
+    async def agenerate(self, prompt: str) -> str:
+        """
+        Async variant of generate().
+        """
+        request = self._chat_request(prompt)
+        if request is None:
+            return f"[{self.provider} stub] {prompt}"
+        key = self._generate_key(request[1], prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        return await self.inflight.ado(
+            key, lambda: self._acall("chat", lambda: self._apost_chat(key, *request), estimate_tokens(prompt))
+        )
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Yield the completion for the given prompt piece by piece, as the
+        provider streams it (`stream: true`).
+
+        Stub and cached responses arrive as a single piece. Failures before
+        the first piece are retried like agenerate(); any failure that is not
+        retried raises LLMError.
+        """
+        request = self._chat_request(prompt)
+        if request is None:
+            yield f"[{self.provider} stub] {prompt}"
+            return
+        url, payload = request
+        key = self._generate_key(payload, prompt)
+        cached = self._cache_get(key)
+        if cached is not None:
+            yield cached
+            return
+        start = time.perf_counter()
+        outcome = "error"
+        trial = self.breaker.allow()
+        parts: list[str] = []
+        attempt = 0
+        body = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        try:
+            while True:
+                await self.limiter.aacquire(estimate_tokens(prompt))
+                try:
+                    async with self._async_client().stream("POST", url, headers=self._headers(), json=body) as resp:
+                        resp.raise_for_status()
+                        async for line in resp.aiter_lines():
+                            chunk = _parse_stream_line(line)
+                            if chunk is None:
+                                continue
+                            self._record_usage(chunk)
+                            delta = _chunk_delta(chunk)
+                            if delta:
+                                parts.append(delta)
+                                yield delta
+                except Exception as exc:  # noqa: BLE001
+                    # Once text has been yielded the stream cannot be replayed.
+                    if not parts and self._should_retry(exc, attempt):
+                        await asyncio.sleep(self._backoff(attempt, exc))
+                        attempt += 1
+                        continue
+                    raise self._failed(exc) from exc
+                break
+            self.breaker.record_success()
+            outcome = "ok"
+        finally:
+            # Covers a consumer closing the stream early (GeneratorExit) or
+            # the request being cancelled mid-trial.
+            self.breaker.release(trial)
+            llm_request_duration.observe(time.perf_counter() - start, self.provider, "chat_stream", outcome)
+        self._cache_set(key, "".join(parts))
 
-    def embed(self, text: str) -> list[float]:
+    @property
+    def embedding_model(self) -> str:
+        """
+        Name of the embedding model that embed() will use.
+
+        Stored alongside persisted vectors so they are invalidated when the
+        provider or model changes.
+        """
+        endpoint = self._embedding_endpoint()
+        return endpoint[1] if endpoint else self.local_embedder.model_name
+
+    def embed(self, text: str, strict: bool = False) -> list[float]:
         """
         Return an embedding vector for the given text.
 
@@ -74,62 +191,428 @@ class LLMClient:
           embeddings endpoint.
         - For provider == 'qwen' and an API key is set, calls the Qwen
           embeddings endpoint (DashScope-compatible).
-        - Otherwise falls back to a simple deterministic stub.
+        - Otherwise uses the local hashing embedder (offline, deterministic).
+
+        With strict=True, provider errors are raised instead of being replaced
+        by a local vector, so callers that persist vectors never store one.
         """
-        if self.provider == "openai" and self.api_key:
+        return self.embed_many([text], strict=strict)[0]
+
+    async def aembed(self, text: str, strict: bool = False) -> list[float]:
+        """
+        Async variant of embed().
+        """
+        return (await self.aembed_many([text], strict=strict))[0]
+
+    def embed_many(self, texts: list[str], strict: bool = False) -> list[list[float]]:
+        """
+        Embed several texts, returning vectors aligned with `texts`.
+
+        Inputs are sent as an `input` array, chunked to the provider's batch
+        limit, so N texts cost ceil(N / batch_size) requests. A failed chunk
+        raises with strict=True, otherwise gets local vectors.
+        """
+        endpoint = self._embedding_endpoint()
+        if endpoint is None:
+            return self.local_embedder.embed_many(texts)
+
+        url, model, batch_size = endpoint
+        vectors, missing = self._cached_embeddings(model, texts)
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start : start + batch_size]
+            chunk_texts = [texts[i] for i in chunk]
             try:
-                resp = httpx.post(
-                    "https://api.openai.com/v1/embeddings",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "text-embedding-3-small",
-                        "input": text,
-                    },
-                    timeout=15.0,
+                fetched = self.inflight.do(
+                    self._batch_key(model, chunk_texts),
+                    lambda: self._call(
+                        "embeddings",
+                        lambda: self._post_embeddings(url, model, chunk_texts),
+                        sum(estimate_tokens(t) for t in chunk_texts),
+                    ),
                 )
-                resp.raise_for_status()
-                data = resp.json()
-                return data["data"][0]["embedding"]
-            except Exception as exc:  # noqa: BLE001
-                # Fall back to stubbed embedding but include error info in length.
-                return [float(len(text)), 1.0, 0.0]
-
-        if self.provider == "qwen" and self.api_key:
+                self._fill_embeddings(model, vectors, chunk, fetched, texts)
+            except Exception:  # noqa: BLE001
+                if strict:
+                    raise
+                for i, vector in zip(chunk, self.local_embedder.embed_many(chunk_texts)):
+                    vectors[i] = vector
+        return vectors  # type: ignore[return-value]
+
+    async def aembed_many(self, texts: list[str], strict: bool = False) -> list[list[float]]:
+        """
+        Async variant of embed_many().
+        """
+        endpoint = self._embedding_endpoint()
+        if endpoint is None:
+            return self.local_embedder.embed_many(texts)
+
+        url, model, batch_size = endpoint
+        vectors, missing = self._cached_embeddings(model, texts)
+        for start in range(0, len(missing), batch_size):
+            chunk = missing[start : start + batch_size]
+            chunk_texts = [texts[i] for i in chunk]
             try:
-                resp = httpx.post(
-                    "https://dashscope.aliyuncs.com/compatible-mode/v1/embeddings",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json={
-                        "model": "text-embedding-v1",
-                        "input": text,
-                    },
-                    timeout=15.0,
+                fetched = await self.inflight.ado(
+                    self._batch_key(model, chunk_texts),
+                    lambda: self._acall(
+                        "embeddings",
+                        lambda: self._apost_embeddings(url, model, chunk_texts),
+                        sum(estimate_tokens(t) for t in chunk_texts),
+                    ),
                 )
-                resp.raise_for_status()
-                data = resp.json()
-                return data["data"][0]["embedding"]
+                self._fill_embeddings(model, vectors, chunk, fetched, texts)
             except Exception:  # noqa: BLE001
-                return [float(len(text)), 1.0, 0.0]
-
-        # Default stub behaviour
-        return [float(len(text)), 1.0, 0.0]
+                if strict:
+                    raise
+                for i, vector in zip(chunk, self.local_embedder.embed_many(chunk_texts)):
+                    vectors[i] = vector
+        return vectors  # type: ignore[return-value]
 
     def info(self) -> dict[str, Any]:
         return {"provider": self.provider, "has_api_key": bool(self.api_key)}
 
+    def stats(self) -> dict[str, Any]:
+        return {
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "inflight": self.inflight.stats(),
+            "rate_limiter": self.limiter.stats(),
+            "circuit": self.breaker.stats(),
+        }
+
+    def close(self) -> None:
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+
+    async def aclose(self) -> None:
+        self.close()
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._async_http = None
+
+    def _call(self, operation: str, fn: Callable[[], T], tokens: int) -> T:
+        """
+        Run one provider request under the rate limiter, retries and circuit
+        breaker, and record its latency under `operation`.
+        """
+        start = time.perf_counter()
+        outcome = "error"
+        trial = None
+        try:
+            trial = self.breaker.allow()
+            attempt = 0
+            while True:
+                self.limiter.acquire(tokens)
+                try:
+                    result = fn()
+                except Exception as exc:  # noqa: BLE001
+                    if self._should_retry(exc, attempt):
+                        time.sleep(self._backoff(attempt, exc))
+                        attempt += 1
+                        continue
+                    raise self._failed(exc) from exc
+                self.breaker.record_success()
+                outcome = "ok"
+                return result
+        finally:
+            self.breaker.release(trial)
+            llm_request_duration.observe(time.perf_counter() - start, self.provider, operation, outcome)
+
+    async def _acall(self, operation: str, fn: Callable[[], Awaitable[T]], tokens: int) -> T:
+        start = time.perf_counter()
+        outcome = "error"
+        trial = None
+        try:
+            trial = self.breaker.allow()
+            attempt = 0
+            while True:
+                await self.limiter.aacquire(tokens)
+                try:
+                    result = await fn()
+                except Exception as exc:  # noqa: BLE001
+                    if self._should_retry(exc, attempt):
+                        await asyncio.sleep(self._backoff(attempt, exc))
+                        attempt += 1
+                        continue
+                    raise self._failed(exc) from exc
+                self.breaker.record_success()
+                outcome = "ok"
+                return result
+        finally:
+            self.breaker.release(trial)
+            llm_request_duration.observe(time.perf_counter() - start, self.provider, operation, outcome)
+
+    def _record_usage(self, body: dict[str, Any]) -> None:
+        usage = body.get("usage")
+        if not usage:
+            return
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                llm_tokens.inc(self.provider, kind.removesuffix("_tokens"), amount=usage[kind])
+
+    def _should_retry(self, exc: Exception, attempt: int) -> bool:
+        return is_retryable(exc) and attempt < self.max_retries
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        return backoff_delay(attempt, settings.llm_backoff_base_seconds, settings.llm_backoff_max_seconds, exc)
+
+    def _failed(self, exc: Exception) -> LLMError:
+        # Only provider-side failures count against the circuit. Anything else
+        # (a 4xx, a malformed body) is neutral: it neither opens nor closes it.
+        if is_retryable(exc):
+            self.breaker.record_failure()
+        return LLMError(f"{self.provider} request failed: {exc}")
+
+    def _post_chat(self, key: str, url: str, payload: dict[str, Any]) -> str:
+        resp = self._sync_client().post(url, headers=self._headers(), json=payload)
+        resp.raise_for_status()
+        body = resp.json()
+        self._record_usage(body)
+        content = body["choices"][0]["message"]["content"]
+        self._cache_set(key, content)
+        return content
+
+    async def _apost_chat(self, key: str, url: str, payload: dict[str, Any]) -> str:
+        resp = await self._async_client().post(url, headers=self._headers(), json=payload)
+        resp.raise_for_status()
+        body = resp.json()
+        self._record_usage(body)
+        content = body["choices"][0]["message"]["content"]
+        self._cache_set(key, content)
+        return content
+
+    def _post_embeddings(self, url: str, model: str, texts: list[str]) -> list[list[float]]:
+        resp = self._sync_client().post(url, headers=self._headers(), json={"model": model, "input": texts})
+        resp.raise_for_status()
+        body = resp.json()
+        self._record_usage(body)
+        return _parse_embeddings(body, len(texts))
+
+    async def _apost_embeddings(self, url: str, model: str, texts: list[str]) -> list[list[float]]:
+        resp = await self._async_client().post(url, headers=self._headers(), json={"model": model, "input": texts})
+        resp.raise_for_status()
+        body = resp.json()
+        self._record_usage(body)
+        return _parse_embeddings(body, len(texts))
+
+    def _generate_key(self, payload: dict[str, Any], prompt: str) -> str:
+        return make_key("generate", self.provider, payload["model"], payload["temperature"], _digest(prompt))
+
+    def _embed_key(self, model: str, text: str) -> str:
+        return make_key("embed", self.provider, model, _digest(text))
+
+    def _batch_key(self, model: str, texts: list[str]) -> str:
+        return make_key("embed_many", self.provider, model, [_digest(t) for t in texts])
+
+    def _cache_get(self, key: str) -> Any | None:
+        return self.cache.get(key) if self.cache is not None else None
+
+    def _cache_set(self, key: str, value: Any) -> None:
+        if self.cache is not None:
+            self.cache.set(key, value)
+
+    def _cached_embeddings(self, model: str, texts: list[str]) -> tuple[list[list[float] | None], list[int]]:
+        """Look up every text in the cache; return (vectors-with-holes, indexes of misses)."""
+        vectors: list[list[float] | None] = [self._cache_get(self._embed_key(model, t)) for t in texts]
+        return vectors, [i for i, v in enumerate(vectors) if v is None]
+
+    def _fill_embeddings(
+        self,
+        model: str,
+        vectors: list[list[float] | None],
+        positions: list[int],
+        fetched: list[list[float]],
+        texts: list[str],
+    ) -> None:
+        for i, vector in zip(positions, fetched):
+            vectors[i] = vector
+            self._cache_set(self._embed_key(model, texts[i]), vector)
+
+    def _chat_request(self, prompt: str) -> tuple[str, dict[str, Any]] | None:
+        if not self.api_key or self.provider not in _CHAT_ENDPOINTS:
+            return None
+        url, model = _CHAT_ENDPOINTS[self.provider]
+        url = _override_base_url(url, "/chat/completions")
+        payload = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.1,
+        }
+        return url, payload
+
+    def _embedding_endpoint(self) -> tuple[str, str, int] | None:
+        if not self.api_key or self.provider not in _EMBEDDING_ENDPOINTS:
+            return None
+        url, model, batch_size = _EMBEDDING_ENDPOINTS[self.provider]
+        return _override_base_url(url, "/embeddings"), model, batch_size
+
+    def _headers(self) -> dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    def _sync_client(self) -> httpx.Client:
+        if self._http is None:
+            self._http = httpx.Client(**_http_options())
+        return self._http
+
+    def _async_client(self) -> httpx.AsyncClient:
+        if self._async_http is None:
+            self._async_http = httpx.AsyncClient(**_http_options())
+        return self._async_http
+
+
+def _retry_budget_seconds() -> float:
+    """Longest one call can take: every attempt times out, each retry after the longest backoff."""
+    backoff = sum(
+        min(settings.llm_backoff_max_seconds, settings.llm_backoff_base_seconds * 2**attempt)
+        for attempt in range(settings.llm_max_retries)
+    )
+    return settings.llm_timeout_seconds * (settings.llm_max_retries + 1) + backoff
+
+
+def _http_options() -> dict[str, Any]:
+    return {
+        "http2": settings.llm_http2,
+        "timeout": settings.llm_timeout_seconds,
+        "limits": httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_connections,
+        ),
+    }
+
+
+def _override_base_url(url: str, path: str) -> str:
+    # LLM_BASE_URL points every provider at another OpenAI-compatible server
+    # (a proxy, a local model, or the benchmark's fake provider).
+    return settings.llm_base_url.rstrip("/") + path if settings.llm_base_url else url
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting: ~4 characters per token for English text."""
+    return len(text) // 4 + 1
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _parse_stream_line(line: str) -> dict[str, Any] | None:
+    # Server-sent events: "data: {chunk json}" lines, ending with "data: [DONE]".
+    if not line.startswith("data:"):
+        return None
+    data = line[len("data:") :].strip()
+    if not data or data == "[DONE]":
+        return None
+    return json.loads(data)
+
+
+def _chunk_delta(chunk: dict[str, Any]) -> str:
+    # The final chunk may carry only `usage`, with no choices.
+    choices = chunk.get("choices") or []
+    if not choices:
+        return ""
+    return (choices[0].get("delta") or {}).get("content") or ""
+
+
+def _parse_embeddings(body: dict[str, Any], expected: int) -> list[list[float]]:
+    data = body["data"]
+    if len(data) != expected:
+        raise ValueError(f"Expected {expected} embeddings, got {len(data)}.")
+    # Results carry their input position; don't rely on list order.
+    data.sort(key=lambda item: item["index"])
+    return [item["embedding"] for item in data]
+
+
+_shared_client: LLMClient | None = None
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Return the process-wide LLMClient, creating it on first use.
+
+    Used as a FastAPI dependency so every request shares one connection pool.
+    """
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = LLMClient(
+            provider=settings.llm_provider,
+            api_key=settings.llm_api_key,
+            cache=_build_cache(),
+        )
+    return _shared_client
+
+
+def _build_cache() -> CacheBackend | None:
+    if not settings.llm_cache_enabled:
+        return None
+    memory = LRUCache(max_entries=settings.llm_cache_max_entries, ttl_seconds=settings.llm_cache_ttl_seconds)
+    disk = SQLiteCache(settings.llm_cache_path, ttl_seconds=settings.llm_cache_ttl_seconds) if settings.llm_cache_path else None
+    return TieredCache(memory, disk)
+
+
+def _collect_client_stats() -> list[tuple[str, str, str, list[tuple[dict[str, str], float]]]]:
+    client = _shared_client
+    if client is None:
+        return []
+    provider = client.provider
+    stats = client.stats()
+    circuit = stats["circuit"]
+    families = [
+        (
+            "llm_singleflight_calls_total",
+            "counter",
+            "Provider calls executed vs. coalesced onto an identical in-flight call.",
+            [({"provider": provider, "result": r}, stats["inflight"][r]) for r in ("executed", "coalesced")],
+        ),
+        (
+            "llm_rate_limiter_waits_total",
+            "counter",
+            "Provider calls delayed by the rate limiter.",
+            [({"provider": provider}, stats["rate_limiter"]["waits"])],
+        ),
+        (
+            "llm_circuit_state",
+            "gauge",
+            "1 for the circuit breaker's current state.",
+            [({"provider": provider, "state": st}, float(circuit["state"] == st)) for st in ("closed", "open", "half_open")],
+        ),
+        (
+            "llm_circuit_transitions_total",
+            "counter",
+            "Circuit breaker state changes.",
+            [({"provider": provider, "transition": t}, n) for t, n in circuit["transitions"].items()],
+        ),
+    ]
+    if stats["cache"] is not None:
+        families.append(
+            (
+                "llm_cache_requests_total",
+                "counter",
+                "Response cache lookups by result.",
+                [
+                    ({"provider": provider, "result": "hit"}, stats["cache"]["hits"]),
+                    ({"provider": provider, "result": "miss"}, stats["cache"]["misses"]),
+                ],
+            )
+        )
+    return families
+
+
+REGISTRY.register_collector(_collect_client_stats)
+
+
+async def close_llm_client() -> None:
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+
 
 if __name__ == "__main__":
     # Simple CLI-style test for the LLM client:
     #   python -m src.utils.llm_client
-    from src.config import settings
-
     client = LLMClient(provider=settings.llm_provider, api_key=settings.llm_api_key)
     print(f"Provider: {client.provider}, has_api_key={bool(client.api_key)}")
     print("Response:", client.generate("Say hello in one short sentence."))
-
@@ -0,0 +1,87 @@
+import warnings
+from collections.abc import Callable
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.models.embedding import TaskEmbedding
+from src.models.job import Job
+from src.models.task import Task, TaskTag
+from src.utils import fts
+
+
+# Data migrations that create_all() cannot express. Each runs once, in order,
+# inside its own transaction; applied names are recorded in schema_migrations.
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("name", String(255), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+def _backfill_task_tags(conn: Connection) -> None:
+    """Populate task_tags from the JSON Task.tags column for existing rows."""
+    rows = conn.execute(select(Task.id, Task.tags).execution_options(yield_per=1000))
+    batch: list[dict] = []
+    for task_id, tags in rows:
+        for tag in dict.fromkeys(tags or []):
+            batch.append({"task_id": task_id, "tag": tag})
+        if len(batch) >= 1000:
+            conn.execute(insert(TaskTag), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(TaskTag), batch)
+
+
+def _create_task_list_indexes(conn: Connection) -> None:
+    """Add the list_tasks composite indexes to databases created before them."""
+    for index in Task.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _create_task_embedding_sync_index(conn: Connection) -> None:
+    """Add the (model, updated_at) index used to refresh in-process vector indexes."""
+    for index in TaskEmbedding.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _add_job_lease_columns(conn: Connection) -> None:
+    """Add the lease columns to jobs tables created before them."""
+    existing = {column["name"] for column in inspect(conn).get_columns("jobs")}
+    for column in (Job.__table__.c.claimed_by, Job.__table__.c.heartbeat_at):
+        if column.name not in existing:
+            conn.execute(text(f"ALTER TABLE jobs ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"))
+
+
+MIGRATIONS: list[tuple[str, Callable[[Connection], None]]] = [
+    ("0001_backfill_task_tags", _backfill_task_tags),
+    ("0002_tasks_full_text_index", fts.create_index),
+    ("0003_task_list_indexes", _create_task_list_indexes),
+    ("0004_task_embedding_sync_index", _create_task_embedding_sync_index),
+    ("0005_job_leases", _add_job_lease_columns),
+]
+
+
+def run_migrations(engine: Engine) -> list[str]:
+    """Apply pending migrations; returns the names that were applied."""
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.name)).scalars())
+
+    ran: list[str] = []
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        try:
+            with engine.begin() as conn:
+                migrate(conn)
+                conn.execute(insert(schema_migrations).values(name=name))
+        except fts.FullTextUnavailableError as exc:
+            # Left unrecorded so it is retried on the next start (e.g. once
+            # SQLite has FTS5); search stays on the ILIKE path until then.
+            warnings.warn(f"Migration {name} not applied: {exc}", RuntimeWarning, stacklevel=2)
+            continue
+        ran.append(name)
+    return ran
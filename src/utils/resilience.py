@@ -0,0 +1,191 @@
+import asyncio
+import random
+import threading
+import time
+from enum import Enum
+from typing import Any
+
+import httpx
+
+
+class LLMError(Exception):
+    """An LLM provider call failed (after any retries)."""
+
+
+class CircuitOpenError(LLMError):
+    """The provider's circuit is open; the call was not attempted."""
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` tokens, refilled at
+    `rate_per_minute`. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None) -> None:
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Take `tokens` from the bucket, going into debt if needed, and return
+        how long the caller must wait before proceeding.
+        """
+        if self.rate <= 0:
+            return 0.0
+        # A request larger than the bucket can never fit; let it drain the bucket.
+        tokens = min(tokens, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for one provider.
+
+    Callers reserve capacity up front and sleep for the returned wait, so
+    bursts are spread out instead of being rejected upstream with a 429.
+    """
+
+    def __init__(self, rpm: float, tpm: float) -> None:
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            self.waits += 1
+            self.waited_seconds += wait
+        return wait
+
+    def acquire(self, tokens: int = 1) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 1) -> None:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict[str, Any]:
+        return {"waits": self.waits, "waited_seconds": round(self.waited_seconds, 3)}
+
+
+class CircuitState(str, Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a provider is down.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    calls raise CircuitOpenError immediately. Once `reset_seconds` have
+    passed, one trial call is let through (half-open): success closes the
+    circuit, failure opens it again. A trial that ends with neither (it was
+    cancelled, or failed for a reason that says nothing about the provider's
+    health) must be handed back with release() so another call can try.
+    Every state change is counted in `transitions`, keyed like "closed->open".
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CircuitState.closed
+        self.failures = 0
+        self.rejected = 0
+        self.transitions: dict[str, int] = {}
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> int | None:
+        """
+        Raise CircuitOpenError unless a call may go ahead. Returns a token
+        when the call is the half-open trial (pass it to release()), else None.
+        """
+        with self._lock:
+            if self.state == CircuitState.open and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._transition(CircuitState.half_open)
+            if self.state == CircuitState.closed:
+                return None
+            if self.state == CircuitState.half_open and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial += 1
+                return self._trial
+            self.rejected += 1
+        raise CircuitOpenError("Circuit open: provider calls are paused after repeated failures.")
+
+    def release(self, trial: int | None) -> None:
+        """End trial `trial` without a verdict; a no-op once it was recorded."""
+        if trial is None:
+            return
+        with self._lock:
+            if self._trial_in_flight and self._trial == trial:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self._trial_in_flight = False
+            if self.state != CircuitState.closed:
+                self._transition(CircuitState.closed)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == CircuitState.half_open or (
+                self.state == CircuitState.closed and self.failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._transition(CircuitState.open)
+
+    def _transition(self, state: CircuitState) -> None:
+        name = f"{self.state.value}->{state.value}"
+        self.transitions[name] = self.transitions.get(name, 0) + 1
+        self.state = state
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+        }
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Throttling (429), server errors (5xx) and transport failures are worth retrying."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code == 429 or code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def backoff_delay(attempt: int, base: float, cap: float, exc: BaseException | None = None) -> float:
+    """
+    Full-jitter exponential backoff for retry number `attempt` (0-based).
+
+    A Retry-After header in seconds on the failed response is honoured, up
+    to `cap`.
+    """
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    if isinstance(exc, httpx.HTTPStatusError):
+        retry_after = exc.response.headers.get("retry-after", "")
+        if retry_after.replace(".", "", 1).isdigit():
+            delay = max(delay, min(cap, float(retry_after)))
+    return delay
@@ -0,0 +1,121 @@
+import asyncio
+import concurrent.futures
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still in flight wait and receive the same result (or exception).
+    Threaded callers use do(), async callers ado(); the two are tracked
+    separately since an event loop cannot block on a thread and vice versa.
+
+    do() followers wait at most `wait_timeout` seconds for the leader and
+    then run the function themselves, so a hung leader thread cannot hang
+    every follower with it.
+    """
+
+    def __init__(self, wait_timeout: float | None = None) -> None:
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._calls: dict[str, Future] = {}
+        self._async_calls: dict[tuple[int, str], _AsyncCall] = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            pending = self._calls.get(key)
+            if pending is None:
+                pending = Future()
+                self._calls[key] = pending
+                leader = True
+                self.executed += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return pending.result(timeout=self.wait_timeout)
+            except concurrent.futures.TimeoutError:
+                # Not the builtin TimeoutError before Python 3.11.
+                if pending.done():
+                    raise
+            with self._lock:
+                self.abandoned += 1
+            return fn()
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        else:
+            pending.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        The call runs in its own task that every caller, the first one
+        included, awaits through shield(). A caller being cancelled (e.g. its
+        client disconnected) leaves the others unaffected; the task itself is
+        cancelled only once nobody is waiting for it any more.
+        """
+        loop = asyncio.get_running_loop()
+        # Tasks belong to one event loop, so key in-flight calls per loop.
+        loop_key = (id(loop), key)
+        with self._lock:
+            call = self._async_calls.get(loop_key)
+            if call is None:
+                call = _AsyncCall(asyncio.ensure_future(fn()))
+                self._async_calls[loop_key] = call
+                call.task.add_done_callback(lambda _: self._forget(loop_key, call))
+                self.executed += 1
+            else:
+                self.coalesced += 1
+            call.waiters += 1
+
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and not call.task.done()
+                if abandoned and self._async_calls.get(loop_key) is call:
+                    # Late arrivals must not join a call being cancelled.
+                    del self._async_calls[loop_key]
+            if abandoned:
+                call.task.cancel()
+
+    def _forget(self, loop_key: tuple[int, str], call: "_AsyncCall") -> None:
+        with self._lock:
+            if self._async_calls.get(loop_key) is call:
+                del self._async_calls[loop_key]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._calls) + len(self._async_calls),
+        }
+
+
+class _AsyncCall:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future) -> None:
+        self.task = task
+        self.waiters = 0
@@ -0,0 +1,130 @@
+import threading
+from typing import Iterable
+
+import numpy as np
+
+
+class VectorIndex:
+    """
+    In-process cosine-similarity index over task embeddings.
+
+    Vectors are L2-normalized and kept in one contiguous float32 matrix, so a
+    query is a single matrix-vector product followed by an argpartition top-k.
+    Rows are mapped to task ids; deleting a task moves the last row into the
+    freed slot so the matrix stays dense.
+    """
+
+    def __init__(self, initial_capacity: int = 1024) -> None:
+        self._lock = threading.RLock()
+        self._capacity = max(1, initial_capacity)
+        self._dim: int | None = None
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._row_of: dict[int, int] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._row_of
+
+    @property
+    def dim(self) -> int | None:
+        return self._dim
+
+    def upsert(self, task_id: int, vector: list[float]) -> None:
+        self.upsert_many([(task_id, vector)])
+
+    def upsert_many(self, items: Iterable[tuple[int, list[float]]]) -> None:
+        with self._lock:
+            for task_id, vector in items:
+                row_vec = self._normalize(vector)
+                row = self._row_of.get(task_id)
+                if row is None:
+                    self._grow(self._size + 1)
+                    row = self._size
+                    self._row_of[task_id] = row
+                    self._ids[row] = task_id
+                    self._size += 1
+                self._matrix[row] = row_vec
+
+    def remove(self, task_id: int) -> bool:
+        with self._lock:
+            row = self._row_of.pop(task_id, None)
+            if row is None:
+                return False
+            last = self._size - 1
+            if row != last:
+                moved_id = int(self._ids[last])
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = moved_id
+                self._row_of[moved_id] = row
+            self._size -= 1
+            return True
+
+    def search(
+        self,
+        query: list[float],
+        k: int,
+        candidate_ids: Iterable[int] | None = None,
+    ) -> list[tuple[int, float]]:
+        """
+        Return up to k (task_id, cosine score) pairs, best first.
+
+        When `candidate_ids` is given, only those tasks are scored; ids that
+        are not in the index are ignored.
+        """
+        if k <= 0 or self._size == 0:
+            return []
+        q = self._normalize(query)
+        # Drain the candidate iterable (which may be a streaming DB cursor)
+        # before taking the lock.
+        candidates = None if candidate_ids is None else np.fromiter(candidate_ids, dtype=np.int64)
+
+        with self._lock:
+            if candidates is None:
+                ids = self._ids[: self._size]
+                scores = self._matrix[: self._size] @ q
+            else:
+                row_of = self._row_of
+                rows = np.fromiter(
+                    (r for r in (row_of.get(tid) for tid in candidates.tolist()) if r is not None),
+                    dtype=np.int64,
+                )
+                if rows.size == 0:
+                    return []
+                ids = self._ids[rows]
+                scores = self._matrix[rows] @ q
+
+        if k < scores.size:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.size)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in top]
+
+    def _normalize(self, vector: list[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        if arr.ndim != 1 or arr.size == 0:
+            raise ValueError("Embedding must be a non-empty 1-D vector.")
+        if self._dim is None:
+            self._dim = int(arr.size)
+        elif arr.size != self._dim:
+            raise ValueError(f"Embedding dimension {arr.size} does not match index dimension {self._dim}.")
+        norm = float(np.linalg.norm(arr))
+        return arr / norm if norm > 0 else arr
+
+    def _grow(self, needed: int) -> None:
+        if self._matrix.shape[0] >= needed and self._matrix.shape[1] == self._dim:
+            return
+        capacity = max(self._capacity, self._matrix.shape[0])
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, self._dim), dtype=np.float32)
+        ids = np.zeros(capacity, dtype=np.int64)
+        if self._size:
+            matrix[: self._size] = self._matrix[: self._size]
+            ids[: self._size] = self._ids[: self._size]
+        self._matrix = matrix
+        self._ids = ids
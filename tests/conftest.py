@@ -0,0 +1,63 @@
+import os
+import tempfile
+from collections.abc import Callable
+from typing import Any
+
+# Settings are read when src is first imported: point the suite at a
+# throwaway database and the offline stub provider, whatever .env says.
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='task-tests-'), 'tasks.db')}"
+os.environ["LLM_PROVIDER"] = "stub"
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.main import app  # noqa: E402
+from src.models.base import Base  # noqa: E402
+from src.services import ai_service, embedding_service  # noqa: E402
+from src.services.task_cache import task_cache  # noqa: E402
+from src.utils.db import engine, init_db  # noqa: E402
+from src.utils.llm_client import LLMClient  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database() -> None:
+    init_db()
+
+
+@pytest.fixture(autouse=True)
+def clean_state(database: None) -> None:
+    """Every test starts from empty tables and empty in-process caches."""
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+    embedding_service._indexes.clear()
+    embedding_service._watermarks.clear()
+    ai_service._chunk_summaries.clear()
+    task_cache.local.clear()
+
+
+@pytest.fixture
+def client() -> TestClient:
+    # No lifespan: tests needing the job workers open `with TestClient(app)`.
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_llm() -> Callable[..., LLMClient]:
+    """
+    Build an LLMClient (OpenAI-shaped unless `provider` says otherwise)
+    whose sync and async provider calls are answered by `handler`.
+    """
+
+    def build(handler: Callable[[httpx.Request], Any], provider: str = "openai", **kwargs: Any) -> LLMClient:
+        transport = httpx.MockTransport(handler)
+        return LLMClient(
+            provider=provider,
+            api_key="test",
+            http_client=httpx.Client(transport=transport),
+            async_http_client=httpx.AsyncClient(transport=transport),
+            **kwargs,
+        )
+
+    return build
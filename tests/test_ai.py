@@ -0,0 +1,164 @@
+import asyncio
+import json
+import re
+import time
+from collections.abc import Callable
+from datetime import datetime
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.config import settings
+from src.controllers import task_controller
+from src.main import app
+from src.models.schemas import NaturalLanguageBatchRequest
+from src.models.task import Task
+from src.services import ai_service
+from src.utils.db import SessionLocal
+from src.utils.llm_client import get_llm_client
+
+
+def test_async_mode_enqueues_job_and_reports_result(client: TestClient) -> None:
+    with TestClient(app) as bg_client:
+        r = bg_client.post("/api/tasks/summary", params={"async_mode": "true"}, json={"task_ids": []})
+        assert r.status_code == 202
+        job_id = r.json()["job_id"]
+
+        for _ in range(50):
+            job = bg_client.get(f"/api/jobs/{job_id}").json()
+            if job["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.05)
+
+    assert job["status"] == "succeeded"
+    assert "summary" in job["result"]
+    assert client.get("/api/jobs/missing").status_code == 404
+
+
+def _nl_replies(
+    fail_text: str = "Gibberish", long_text: str = "Ramble on", cancel_text: str | None = None
+) -> Callable[[httpx.Request], httpx.Response]:
+    """Provider handler whose NL parse replies are canned per input text."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if "input" in body:
+            data = [{"index": i, "embedding": [1.0, float(len(t))]} for i, t in enumerate(body["input"])]
+            return httpx.Response(200, json={"data": data})
+        text = re.search(r'command:\n"(.*)"', body["messages"][0]["content"]).group(1)
+        if text == cancel_text:
+            raise asyncio.CancelledError()
+        if text == fail_text:
+            content = "not json"
+        elif text == long_text:
+            content = json.dumps({"title": "x" * 300, "description": text, "priority": "low", "tags": []})
+        else:
+            content = json.dumps({"title": text.split(".")[0], "description": text, "priority": "low", "tags": []})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    return handler
+
+
+def test_natural_language_batch_creation(client: TestClient, mock_llm) -> None:
+    llm = mock_llm(_nl_replies())
+    app.dependency_overrides[get_llm_client] = lambda: llm
+    try:
+        r = client.post(
+            "/api/tasks/natural-language/batch",
+            json={"texts": ["Water the plants. Twice a week.", "no", "Gibberish", "Ramble on", "Call the bank about the card."]},
+        )
+    finally:
+        app.dependency_overrides.pop(get_llm_client)
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [item["ok"] for item in results] == [True, False, False, False, True]
+    assert "not valid JSON" in results[2]["error"]
+    # A parsed title too long for TaskCreate fails only that item.
+    assert results[3]["error"].startswith("title:")
+    assert client.get(f"/api/tasks/{results[0]['id']}").json()["title"] == "Water the plants"
+
+
+def test_cancelled_nl_batch_item_cancels_the_batch(mock_llm) -> None:
+    req = NaturalLanguageBatchRequest(texts=["Water the plants.", "stop"])
+    llm = mock_llm(_nl_replies(cancel_text="stop"))
+    with SessionLocal() as db, pytest.raises(asyncio.CancelledError):
+        asyncio.run(task_controller.create_tasks_from_nl_batch(db, req, llm))
+
+
+def test_large_summaries_are_map_reduced_and_chunks_cached(mock_llm, monkeypatch) -> None:
+    prompts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompts.append(json.loads(request.content)["messages"][0]["content"])
+        content = json.dumps({"summary": f"part {len(prompts)}"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    monkeypatch.setattr(settings, "summary_chunk_tokens", 60)
+    llm = mock_llm(handler)
+    stamp = datetime(2024, 1, 1)
+    tasks = [Task(id=900000 + i, title=f"map reduce task {i}", description="x" * 40, updated_at=stamp) for i in range(12)]
+
+    first = asyncio.run(ai_service.asummarize_tasks(tasks, llm))
+    assert first["count"] == 12 and first["summary"].startswith("part")
+    chunk_calls = sum("Tasks:" in p for p in prompts)
+    assert chunk_calls > 1 and any("Partial summaries:" in p for p in prompts)
+
+    prompts.clear()
+    tasks[0].title = "edited"
+    asyncio.run(ai_service.asummarize_tasks(tasks, llm))
+    assert sum("Tasks:" in p for p in prompts) == 1
+
+
+def test_summary_chunks_keep_their_boundaries_when_a_task_changes_length(mock_llm, monkeypatch) -> None:
+    prompts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompts.append(json.loads(request.content)["messages"][0]["content"])
+        return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps({"summary": "part"})}}]})
+
+    monkeypatch.setattr(settings, "summary_chunk_tokens", 60)
+    monkeypatch.setattr(settings, "summary_chunk_size", 3)
+    llm = mock_llm(handler)
+    stamp = datetime(2024, 1, 1)
+    tasks = [Task(id=900000 + i, title=f"chunked task {i}", description="x" * 40, updated_at=stamp) for i in range(12)]
+    asyncio.run(ai_service.asummarize_tasks(tasks, llm))
+    assert sum("Tasks:" in p for p in prompts) == 4
+
+    # A longer task no longer fits its chunk; under pure token packing every
+    # later boundary would shift and every later chunk be summarized again.
+    prompts.clear()
+    tasks[1].description = "x" * 120
+    asyncio.run(ai_service.asummarize_tasks(tasks, llm))
+    resummarized = [p for p in prompts if "Tasks:" in p]
+    assert resummarized and all("chunked task 9" not in p and "chunked task 3" not in p for p in resummarized)
+
+
+def test_summary_rejects_more_tasks_than_the_limit(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "summary_max_tasks", 2)
+    for title in ("one", "two", "three"):
+        client.post("/api/tasks", json={"title": title})
+
+    for path in ("/api/tasks/summary", "/api/tasks/summary/stream"):
+        r = client.post(path, json={})
+        assert r.status_code == 400
+        assert "max 2" in r.json()["detail"]
+    assert client.post("/api/tasks/summary", json={"task_ids": [1, 2, 3]}).status_code == 400
+    assert client.post("/api/tasks/summary", json={"task_ids": [1, 2]}).status_code == 200
+
+
+def test_export_ndjson_and_streamed_summary(client: TestClient) -> None:
+    for title in ("export one", "export two"):
+        client.post("/api/tasks", json={"title": title, "tags": ["export-test"]})
+
+    r = client.get("/api/tasks/export", params={"tag": "export-test"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert {row["title"] for row in rows} >= {"export one", "export two"}
+
+    with client.stream("POST", "/api/tasks/summary/stream", json={"task_ids": [rows[0]["id"]]}) as stream:
+        assert stream.headers["content-type"].startswith("text/event-stream")
+        body = "".join(stream.iter_text())
+    assert 'data: {"delta": "1 task: ' in body
+    assert body.rstrip().splitlines()[-2] == "event: done"
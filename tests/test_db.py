@@ -0,0 +1,75 @@
+import itertools
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.exc import OperationalError
+
+from src.models.base import Base
+from src.models.schemas import TaskQueryParams
+from src.models.task import Task
+from src.services import task_service
+from src.utils import fts
+from src.utils.db import ReadSessionLocal, SessionLocal, read_engine
+from src.utils.migrations import run_migrations, schema_migrations
+
+
+def test_list_task_queries_use_indexes_for_every_filter_combination() -> None:
+    full_scan = re.compile(r"\bSCAN (tasks|task_tags)\b(?! USING)")
+    combos = itertools.product(
+        (None, "pending"),  # status
+        (None, "high"),  # priority
+        ((None, "all"), ("a", "all"), ("a,b", "all"), ("a,b", "any")),  # tags, tag_mode
+        (None, "report"),  # search
+        (False, True),  # descending
+        (False, True),  # cursor
+    )
+    with SessionLocal() as db:
+        if db.get_bind().dialect.name != "sqlite":
+            return
+        for status, priority, (tags, tag_mode), search, descending, use_cursor in combos:
+            if search and use_cursor:
+                continue
+            cursor = task_service.encode_cursor(Task(id=10, created_at=datetime(2024, 1, 1)), descending) if use_cursor else None
+            params = TaskQueryParams(
+                status=status, priority=priority, tags=tags, tag_mode=tag_mode, search=search, descending=descending, cursor=cursor
+            )
+            stmt = task_service.build_list_query(db, params)
+            sql = str(stmt.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+            plan = [row[3] for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + sql)]
+
+            assert not any(full_scan.search(step) for step in plan), (params, plan)
+            if not tags and not search:
+                # The (status/priority, created_at, id) indexes also provide the order.
+                assert not any("TEMP B-TREE FOR ORDER BY" in step for step in plan), (params, plan)
+
+
+def test_sqlite_engine_profile_uses_wal_and_read_only_pool() -> None:
+    with SessionLocal() as db:
+        if db.get_bind().dialect.name != "sqlite":
+            return
+        assert db.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.execute(text("PRAGMA busy_timeout")).scalar() > 0
+
+    with ReadSessionLocal() as db:
+        assert db.get_bind() is read_engine
+        db.execute(text("SELECT count(*) FROM tasks")).scalar()
+        with pytest.raises(OperationalError):
+            db.execute(text("DELETE FROM tasks"))
+
+
+def test_full_text_migration_is_retried_until_fts5_is_available(tmp_path, monkeypatch) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'no-fts.db'}")
+    Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(fts, "_has_fts5", lambda conn: False)
+    with pytest.warns(RuntimeWarning, match="0002_tasks_full_text_index"):
+        ran = run_migrations(engine)
+    assert "0002_tasks_full_text_index" not in ran and "0003_task_list_indexes" in ran
+
+    monkeypatch.undo()
+    assert run_migrations(engine) == ["0002_tasks_full_text_index"]
+    with engine.connect() as conn:
+        assert "0002_tasks_full_text_index" in set(conn.execute(select(schema_migrations.c.name)).scalars())
+        assert conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE name = 'tasks_fts'").first()
+    engine.dispose()
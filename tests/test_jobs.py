@@ -0,0 +1,86 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from src.models.job import Job, JobStatus
+from src.services import job_service
+from src.utils.db import SessionLocal
+
+
+def _job(job_id: str, status: str, claimed_by=None, heartbeat_at=None):
+    return Job(
+        id=job_id,
+        kind="summary",
+        provider="stub",
+        status=status,
+        payload={"task_ids": []},
+        claimed_by=claimed_by,
+        heartbeat_at=heartbeat_at,
+    )
+
+
+def test_only_jobs_with_an_expired_lease_are_requeued() -> None:
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    with SessionLocal() as db:
+        db.add_all(
+            [
+                _job("live", "running", "sibling", now),
+                _job("expired", "running", "dead", now - timedelta(minutes=5)),
+                _job("unleased", "running"),
+                _job("waiting", "queued"),
+            ]
+        )
+        db.commit()
+
+    queued = job_service._maintain_leases([], lease_seconds=60, limit=None)
+
+    assert sorted(queued) == ["expired", "unleased", "waiting"]
+    with SessionLocal() as db:
+        live = db.get(Job, "live")
+        assert live.status == "running" and live.claimed_by == "sibling"
+        assert db.get(Job, "expired").claimed_by is None
+
+
+def test_claimed_jobs_keep_their_lease_while_running() -> None:
+    with SessionLocal() as db:
+        db.add(_job("mine", "queued"))
+        db.commit()
+        job = job_service._claim_job(db, "mine")
+        assert job is not None and job.claimed_by == job_service.WORKER_ID
+        stale = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=5)
+        db.execute(update(Job).where(Job.id == "mine").values(heartbeat_at=stale))
+        db.commit()
+
+    # The heartbeat renews the lease before expired ones are swept.
+    assert job_service._maintain_leases(["mine"], lease_seconds=60, limit=None) == []
+    with SessionLocal() as db:
+        assert db.get(Job, "mine").status == "running"
+
+
+def test_a_worker_that_lost_its_lease_does_not_finish_the_job() -> None:
+    with SessionLocal() as db:
+        db.add(_job("taken", "queued"))
+        db.commit()
+        assert job_service._claim_job(db, "taken") is not None
+        # The lease expired and a sibling worker claimed the job again.
+        db.execute(update(Job).where(Job.id == "taken").values(claimed_by="sibling"))
+        db.commit()
+
+        assert not job_service._finish_job(db, "taken", JobStatus.succeeded, {"late": True}, None)
+        db.expire_all()
+        job = db.get(Job, "taken")
+        assert job.status == "running" and job.result is None
+
+
+def test_async_mode_returns_503_while_the_job_queue_is_full(client: TestClient, monkeypatch) -> None:
+    queue: asyncio.Queue[str] = asyncio.Queue(maxsize=1)
+    queue.put_nowait("waiting")
+    monkeypatch.setattr(job_service.job_queue, "_queue", queue)
+
+    r = client.post("/api/tasks/summary", params={"async_mode": "true"}, json={"task_ids": []})
+
+    assert r.status_code == 503
+    assert r.headers["Retry-After"]
+    assert job_service.job_queue.enqueue("another") is False
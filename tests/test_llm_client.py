@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.config import settings
+from src.utils.cache import LRUCache
+from src.utils.resilience import CircuitBreaker, CircuitOpenError, CircuitState, LLMError
+
+
+def test_embed_many_batches_and_keeps_order(mock_llm) -> None:
+    calls: list[list[str]] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        inputs = json.loads(request.content)["input"]
+        calls.append(inputs)
+        # Reply out of order; the client must realign by "index".
+        data = [{"index": i, "embedding": [float(len(t))]} for i, t in enumerate(inputs)]
+        return httpx.Response(200, json={"data": data[::-1]})
+
+    qwen = mock_llm(handler, provider="qwen")
+    texts = ["x" * n for n in range(1, 31)]
+    vectors = qwen.embed_many(texts)
+
+    assert [len(c) for c in calls] == [25, 5]
+    assert vectors == [[float(n)] for n in range(1, 31)]
+
+
+def test_generate_is_served_from_cache(mock_llm) -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(200, json={"choices": [{"message": {"content": '{"summary": "ok"}'}}]})
+
+    cache = LRUCache(max_entries=8)
+    llm = mock_llm(handler, cache=cache)
+    assert llm.generate("same prompt") == llm.generate("same prompt")
+    assert calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_identical_generate_calls_are_coalesced(mock_llm) -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.2)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "shared"}}]})
+
+    llm = mock_llm(handler)
+    results: list[str] = []
+    threads = [threading.Thread(target=lambda: results.append(llm.generate("burst"))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["shared"] * 5
+    assert calls == 1
+    assert llm.inflight.stats()["coalesced"] == 4
+
+
+def test_astream_yields_provider_deltas(mock_llm) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        chunks = [{"choices": [{"delta": {"content": piece}}]} for piece in ("Two ", "tasks.")]
+        body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    llm = mock_llm(handler)
+
+    async def collect() -> list[str]:
+        return [delta async for delta in llm.astream("summarize")]
+
+    assert asyncio.run(collect()) == ["Two ", "tasks."]
+
+
+def test_llm_client_retries_throttling_then_opens_circuit(mock_llm, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_backoff_base_seconds", 0.0)
+    statuses = [429, 503, 200]
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        code = statuses.pop(0)
+        if code != 200:
+            return httpx.Response(code, headers={"retry-after": "0"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "recovered"}}]})
+
+    llm = mock_llm(flaky)
+    assert llm.generate("retry me") == "recovered"
+    assert statuses == []
+
+    calls = 0
+
+    def down(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(500)
+
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    llm = mock_llm(down, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    for prompt in ("a", "b"):
+        with pytest.raises(LLMError):
+            llm.generate(prompt)
+    with pytest.raises(CircuitOpenError):
+        llm.generate("c")
+    assert calls == 2
+    assert llm.stats()["circuit"]["transitions"] == {"closed->open": 1}
+
+
+def test_llm_base_url_overrides_provider_endpoints(mock_llm, monkeypatch) -> None:
+    seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(str(request.url))
+        if request.url.path.endswith("/embeddings"):
+            return httpx.Response(200, json={"data": [{"index": 0, "embedding": [1.0]}]})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+    monkeypatch.setattr(settings, "llm_base_url", "http://127.0.0.1:8999/v1/")
+    llm = mock_llm(handler, provider="qwen")
+    llm.generate("hi")
+    llm.embed("hi")
+    assert seen == ["http://127.0.0.1:8999/v1/chat/completions", "http://127.0.0.1:8999/v1/embeddings"]
+
+
+def test_cancelled_half_open_trial_does_not_wedge_the_circuit(mock_llm, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    mode = "down"
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if mode == "down":
+            return httpx.Response(500)
+        if mode == "hang":
+            await asyncio.sleep(10)
+        if json.loads(request.content).get("stream"):
+            chunks = [{"choices": [{"delta": {"content": piece}}]} for piece in ("a", "b")]
+            body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "back"}}]})
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    llm = mock_llm(handler, breaker=breaker)
+
+    async def scenario() -> str:
+        nonlocal mode
+        with pytest.raises(LLMError):
+            await llm.agenerate("fail")
+        assert breaker.state == CircuitState.open
+
+        # The half-open trial is cancelled (client disconnect / timeout)...
+        mode = "hang"
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(llm.agenerate("cancelled"), timeout=0.05)
+        # ...and a stream consumer walks away after the first piece.
+        mode = "up"
+        stream = llm.astream("abandoned")
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+        assert breaker.state == CircuitState.half_open
+
+        # Neither left the trial slot taken: the provider is back, so is the circuit.
+        return await llm.agenerate("recovered")
+
+    assert asyncio.run(scenario()) == "back"
+    assert breaker.state == CircuitState.closed
+
+
+def test_malformed_responses_are_neutral_for_the_circuit(mock_llm, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_max_retries", 0)
+    replies = [httpx.Response(500), httpx.Response(200, json={"unexpected": True}), httpx.Response(400), httpx.Response(500)]
+    llm = mock_llm(lambda request: replies.pop(0), breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    for prompt in ("server error", "garbage", "bad request", "server error again"):
+        with pytest.raises(LLMError):
+            llm.generate(prompt)
+    # The garbage 200 and the 400 neither reset nor add to the failure count.
+    with pytest.raises(CircuitOpenError):
+        llm.generate("rejected")
+    assert llm.stats()["circuit"]["transitions"] == {"closed->open": 1}
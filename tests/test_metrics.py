@@ -0,0 +1,14 @@
+from fastapi.testclient import TestClient
+
+
+def test_metrics_endpoint_reports_routes_and_queries(client: TestClient) -> None:
+    task_id = client.post("/api/tasks", json={"title": "metrics task"}).json()["id"]
+    client.get(f"/api/tasks/{task_id}")
+
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/tasks/{task_id}",status="200"}' in text
+    assert 'db_query_duration_seconds_bucket{operation="SELECT",le="+Inf"}' in text
+    assert "# TYPE llm_request_duration_seconds histogram" in text
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+import time
+
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, insert, select
+
+from src.config import settings
+from src.controllers import task_controller
+from src.main import app
+from src.models.embedding import TaskEmbedding
+from src.models.schemas import TaskCreate, TaskUpdate
+from src.models.task import Task
+from src.services import embedding_service
+from src.services.search_service import reciprocal_rank_fusion
+from src.utils.db import SessionLocal
+from src.utils.hashing_embedder import HashingEmbedder
+from src.utils.llm_client import get_llm_client
+from src.utils.vector_index import VectorIndex
+
+
+def test_task_embedding_is_stored_and_refreshed(client: TestClient) -> None:
+    r = client.post("/api/tasks", json={"title": "embed me", "tags": ["ai"]})
+    assert r.status_code == 201
+    task_id = r.json()["id"]
+
+    with SessionLocal() as db:
+        row = db.query(TaskEmbedding).filter_by(task_id=task_id).one()
+        first_hash = row.content_hash
+
+    # Status-only updates keep the stored vector; title changes refresh it.
+    client.patch(f"/api/tasks/{task_id}", json={"status": "completed"})
+    client.patch(f"/api/tasks/{task_id}", json={"title": "embed me again"})
+    with SessionLocal() as db:
+        row = db.query(TaskEmbedding).filter_by(task_id=task_id).one()
+        assert row.content_hash != first_hash
+
+
+def test_vector_index_top_k_and_delete() -> None:
+    index = VectorIndex(initial_capacity=2)
+    index.upsert_many([(1, [1.0, 0.0]), (2, [0.0, 1.0]), (3, [1.0, 1.0])])
+    hits = index.search([1.0, 0.1], k=2)
+    assert [tid for tid, _ in hits] == [1, 3]
+
+    index.remove(1)
+    assert 1 not in index and len(index) == 2
+    assert index.search([1.0, 0.0], k=1, candidate_ids=[2])[0][0] == 2
+
+
+def test_semantic_search_ranks_beyond_first_rows_with_filters(client: TestClient) -> None:
+    # Pad the table so the target is well past the first `limit` rows.
+    for i in range(12):
+        client.post("/api/tasks", json={"title": f"filler {i}", "priority": "low"})
+    r = client.post("/api/tasks", json={"title": "needle", "priority": "high", "tags": ["needle"]})
+    target_id = r.json()["id"]
+
+    r = client.post("/api/tasks/search", json={"query": "needle", "limit": 3, "priority": "high", "tag": "needle"})
+    assert r.status_code == 200
+    ids = [item["task_id"] for item in r.json()["results"]]
+    assert target_id in ids
+
+
+def test_hybrid_search_fuses_lexical_and_vector_channels(client: TestClient) -> None:
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60)
+    assert [tid for tid, _ in fused] == [1, 3, 2]
+
+    r = client.post("/api/tasks", json={"title": "quokka census", "description": "count every quokka"})
+    target = r.json()["id"]
+    for mode in ("lexical", "hybrid"):
+        r = client.post("/api/tasks/search", json={"query": "quokka", "limit": 3, "mode": mode})
+        assert r.status_code == 200
+        assert r.json()["results"][0]["task_id"] == target
+
+
+def test_local_embeddings_rank_related_text_first(client: TestClient) -> None:
+    embedder = HashingEmbedder(dim=128)
+    vectors = embedder.embed_batch(["deploy the payment service", "deploy payment service", "buy groceries for dinner"])
+    assert vectors.shape == (3, 128)
+    assert vectors[0] @ vectors[1] > 0.7 > vectors[0] @ vectors[2]
+    assert embedder.embed("deploy the payment service") == vectors[0].tolist()
+
+    ids = [
+        client.post("/api/tasks", json={"title": title}).json()["id"]
+        for title in ("Deploy the invoicing service", "Buy groceries for dinner")
+    ]
+    r = client.post("/api/tasks/search", json={"query": "invoicing service deployment", "limit": 50})
+    ranked = [hit["task_id"] for hit in r.json()["results"] if hit["task_id"] in ids]
+    assert ranked[0] == ids[0]
+
+
+def test_search_does_not_embed_tasks_and_startup_backfills_them(client: TestClient) -> None:
+    # Written behind the API's back, so no embedding is stored for it.
+    with SessionLocal() as db:
+        db.execute(insert(Task).values(title="orphan quokka", tags=[]))
+        db.commit()
+
+    def stored() -> int:
+        with SessionLocal() as db:
+            return db.execute(select(func.count()).select_from(TaskEmbedding)).scalar_one()
+
+    for mode in ("semantic", "hybrid"):
+        assert client.post("/api/tasks/search", json={"query": "quokka", "mode": mode}).status_code == 200
+    assert stored() == 0
+
+    # Startup notices the missing vector and queues a background backfill.
+    with TestClient(app):
+        for _ in range(50):
+            if stored() == 1:
+                break
+            time.sleep(0.05)
+    assert stored() == 1
+
+
+def test_task_writes_embed_after_the_response() -> None:
+    llm = get_llm_client()
+
+    def stored_hash(task_id: int) -> str | None:
+        with SessionLocal() as db:
+            row = db.get(TaskEmbedding, (task_id, llm.embedding_model))
+            return row.content_hash if row else None
+
+    background = BackgroundTasks()
+    with SessionLocal() as db:
+        task_id = task_controller.create_task(db, TaskCreate(title="deferred ibis"), llm, background).id
+    assert stored_hash(task_id) is None
+    asyncio.run(background())
+    first = stored_hash(task_id)
+    assert first is not None
+
+    background = BackgroundTasks()
+    with SessionLocal() as db:
+        task_controller.update_task(db, task_id, TaskUpdate(title="deferred heron"), llm, background)
+    assert stored_hash(task_id) == first
+    asyncio.run(background())
+    assert stored_hash(task_id) not in (None, first)
+
+
+def test_tasks_left_without_a_vector_are_embedded_on_a_later_tick(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "embedding_backfill_interval_seconds", 0.05)
+
+    def stored() -> int:
+        with SessionLocal() as db:
+            return db.execute(select(func.count()).select_from(TaskEmbedding)).scalar_one()
+
+    with TestClient(app):
+        # Written after startup, e.g. its embedding failed on the write path.
+        with SessionLocal() as db:
+            db.execute(insert(Task).values(title="late pelican", tags=[]))
+            db.commit()
+        for _ in range(50):
+            if stored() == 1:
+                break
+            time.sleep(0.05)
+    assert stored() == 1
+
+
+def test_vector_index_catches_up_with_other_workers(client: TestClient) -> None:
+    llm = get_llm_client()
+    model = llm.embedding_model
+    first = client.post("/api/tasks", json={"title": "walrus feeding schedule"}).json()["id"]
+    hits = client.post("/api/tasks/search", json={"query": "walrus", "mode": "semantic"}).json()["results"]
+    assert hits[0]["task_id"] == first  # index loaded in this process
+
+    # Another worker process creates a task and deletes the first one,
+    # writing straight to the shared database.
+    with SessionLocal() as db:
+        other = db.execute(insert(Task).values(title="narwhal tusk survey", tags=[]).returning(Task.id)).scalar_one()
+        vector = llm.embed("narwhal tusk survey ")
+        db.execute(insert(TaskEmbedding).values(task_id=other, model=model, content_hash="x", vector=vector))
+        db.execute(delete(TaskEmbedding).where(TaskEmbedding.task_id == first))
+        db.execute(delete(Task).where(Task.id == first))
+        db.commit()
+
+    hits = client.post("/api/tasks/search", json={"query": "narwhal", "mode": "semantic"}).json()["results"]
+    assert hits[0]["task_id"] == other
+    assert first not in [hit["task_id"] for hit in hits]
+    assert first not in embedding_service._indexes[model]
+
+
+def test_async_index_load_runs_off_the_event_loop(monkeypatch) -> None:
+    threads: list[int] = []
+    get_index = embedding_service.get_index
+
+    def recording_get_index(db, model):  # noqa: ANN001, ANN202
+        threads.append(threading.get_ident())
+        return get_index(db, model)
+
+    monkeypatch.setattr(embedding_service, "get_index", recording_get_index)
+
+    async def scenario() -> tuple[int, VectorIndex]:
+        return threading.get_ident(), await embedding_service.aget_index("some-model")
+
+    loop_thread, index = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
+    assert embedding_service._indexes["some-model"] is index
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+from src.config import settings
+from src.utils.singleflight import SingleFlight
+
+
+def test_cancelled_leader_does_not_cancel_coalesced_callers() -> None:
+    flight = SingleFlight()
+    runs = 0
+
+    async def work() -> str:
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario() -> list[object]:
+        leader = asyncio.ensure_future(flight.ado("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.ado("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(leader, follower, return_exceptions=True)
+
+    leader_outcome, follower_outcome = asyncio.run(scenario())
+    assert isinstance(leader_outcome, asyncio.CancelledError)
+    assert follower_outcome == "done"
+    assert runs == 1 and flight.stats()["in_flight"] == 0
+
+
+def test_abandoned_async_call_is_cancelled_and_not_joined() -> None:
+    flight = SingleFlight()
+    started = 0
+
+    async def work() -> str:
+        nonlocal started
+        started += 1
+        await asyncio.sleep(10)
+        return "never"
+
+    async def scenario() -> None:
+        caller = asyncio.ensure_future(flight.ado("k", work))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        # The only waiter left: the shared call is gone and a new caller starts afresh.
+        assert flight.stats()["in_flight"] == 0
+        again = asyncio.ensure_future(flight.ado("k", work))
+        await asyncio.sleep(0.01)
+        again.cancel()
+        await asyncio.gather(again, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert started == 2
+
+
+def test_followers_stop_waiting_for_a_hung_leader() -> None:
+    flight = SingleFlight(wait_timeout=0.05)
+    release = threading.Event()
+
+    def hung() -> str:
+        release.wait(5)
+        return "leader"
+
+    leader = threading.Thread(target=lambda: flight.do("k", hung))
+    leader.start()
+    time.sleep(0.02)
+    start = time.monotonic()
+    assert flight.do("k", lambda: "follower") == "follower"
+    assert time.monotonic() - start < 1
+    assert flight.stats()["abandoned"] == 1
+    release.set()
+    leader.join()
+
+
+def test_llm_followers_wait_out_the_leaders_retries(mock_llm, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "llm_timeout_seconds", 10.0)
+    monkeypatch.setattr(settings, "llm_max_retries", 3)
+    monkeypatch.setattr(settings, "llm_backoff_base_seconds", 1.0)
+    monkeypatch.setattr(settings, "llm_backoff_max_seconds", 3.0)
+    llm = mock_llm(lambda request: None)
+    # Four attempts of 10s, plus backoffs of 1s, 2s and 3s (capped).
+    assert llm.inflight.wait_timeout == 46.0
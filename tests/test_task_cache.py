@@ -0,0 +1,102 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from src.config import settings
+from src.services.task_cache import TaskCache, _build_task_cache, task_cache
+from src.utils.cache import LRUCache
+
+
+class FakeSharedCache:
+    """Stands in for an external cache shared by several processes."""
+
+    def __init__(self) -> None:
+        self.data: dict[str, object] = {}
+        self.hits = self.misses = 0
+        self.threads: set[int] = set()
+
+    def get(self, key: str) -> object | None:
+        self.threads.add(threading.get_ident())
+        return self.data.get(key)
+
+    def set(self, key: str, value: object, ttl: float | None = None) -> None:
+        self.threads.add(threading.get_ident())
+        self.data[key] = value
+
+    def delete(self, key: str) -> None:
+        self.data.pop(key, None)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+def test_task_cache_serves_reads_and_is_invalidated_by_writes(client: TestClient, monkeypatch) -> None:
+    monkeypatch.setattr(task_cache, "enabled", True)
+    task_id = client.post("/api/tasks", json={"title": "Cached", "tags": ["cache"]}).json()["id"]
+    before = task_cache.stats()["hits"]
+    assert client.get(f"/api/tasks/{task_id}").json()["title"] == "Cached"
+    assert client.get(f"/api/tasks/{task_id}").json()["title"] == "Cached"
+    assert task_cache.stats()["hits"] == before + 1
+    assert task_id in [t["id"] for t in client.get("/api/tasks", params={"tag": "cache", "limit": 100}).json()]
+
+    client.patch(f"/api/tasks/{task_id}", json={"title": "Cached v2"})
+    assert client.get(f"/api/tasks/{task_id}").json()["title"] == "Cached v2"
+    listed = client.get("/api/tasks", params={"tag": "cache", "limit": 100}).json()
+    assert [t["title"] for t in listed if t["id"] == task_id] == ["Cached v2"]
+    client.delete(f"/api/tasks/{task_id}")
+    assert client.get(f"/api/tasks/{task_id}").status_code == 404
+    assert task_id not in [t["id"] for t in client.get("/api/tasks", params={"tag": "cache", "limit": 100}).json()]
+
+    # Two "processes" with their own in-memory tier share one backend: a
+    # write seen by one invalidates what the other has cached locally.
+    shared = FakeSharedCache()
+    worker_a, worker_b = TaskCache(LRUCache(), shared), TaskCache(LRUCache(), shared)
+    loads: list[str] = []
+
+    def load(value):  # noqa: ANN001, ANN202
+        def fn():  # noqa: ANN202
+            loads.append(value)
+            return value
+
+        return fn
+
+    assert worker_a.get_task(1, load("v1")) == "v1"
+    assert worker_b.get_task(1, load("unused")) == "v1"
+    assert worker_b.list_tasks({"limit": 10}, load(("[]", None))) == ("[]", None)
+    worker_a.invalidate([1])
+    assert worker_b.get_task(1, load("v2")) == "v2"
+    assert worker_a.list_tasks({"limit": 10}, load(("[1]", "c"))) == ("[1]", "c")
+    assert loads == ["v1", ("[]", None), "v2", ("[1]", "c")]
+
+
+def test_task_cache_is_off_by_default_without_a_shared_backend(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(settings, "task_cache_enabled", None)
+    monkeypatch.setattr(settings, "task_cache_path", None)
+    assert not _build_task_cache().enabled
+
+    monkeypatch.setattr(settings, "task_cache_path", str(tmp_path / "task-cache.db"))
+    assert _build_task_cache().enabled
+
+    monkeypatch.setattr(settings, "task_cache_enabled", False)
+    assert not _build_task_cache().enabled
+
+
+def test_async_task_cache_keeps_shared_round_trips_off_the_event_loop() -> None:
+    shared = FakeSharedCache()
+    cache = TaskCache(LRUCache(), shared)
+
+    async def load_task() -> str:
+        return "v1"
+
+    async def load_page() -> tuple[str, None]:
+        return "[]", None
+
+    async def scenario() -> int:
+        assert await cache.aget_task(1, load_task) == "v1"
+        assert await cache.alist_tasks({"limit": 10}, load_page) == ("[]", None)
+        await cache.ainvalidate([1])
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert shared.threads and loop_thread not in shared.threads
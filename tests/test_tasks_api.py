@@ -0,0 +1,161 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.models.schemas import TaskCreate, TaskQueryParams, TaskUpdate
+from src.routes.async_task_routes import router as async_crud_router
+from src.routes.task_routes import router as task_router
+from src.services import task_service
+from src.utils.db import SessionLocal, engine
+
+
+def test_bulk_create_update_delete(client: TestClient) -> None:
+    r = client.post(
+        "/api/tasks/bulk",
+        json={"items": [{"title": "bulk a"}, {"title": ""}, {"title": "bulk c", "tags": ["x"]}]},
+    )
+    assert r.status_code == 200
+    body = r.json()
+    assert body["succeeded"] == 2 and body["failed"] == 1
+    assert [item["ok"] for item in body["results"]] == [True, False, True]
+    id_a, id_c = body["results"][0]["id"], body["results"][2]["id"]
+    assert id_a < id_c
+
+    r = client.patch(
+        "/api/tasks/bulk",
+        json={"items": [{"id": id_a, "status": "completed"}, {"id": 999999, "title": "nope"}]},
+    )
+    assert [item["ok"] for item in r.json()["results"]] == [True, False]
+    assert client.get(f"/api/tasks/{id_a}").json()["status"] == "completed"
+
+    r = client.request("DELETE", "/api/tasks/bulk", json={"ids": [id_a, id_c, 999999]})
+    assert r.json()["succeeded"] == 2
+    assert client.get(f"/api/tasks/{id_c}").status_code == 404
+
+
+def test_list_tasks_keyset_pagination(client: TestClient) -> None:
+    created = client.post("/api/tasks/bulk", json={"items": [{"title": f"page {i}"} for i in range(5)]})
+    ids = {item["id"] for item in created.json()["results"]}
+
+    seen: list[int] = []
+    r = client.get("/api/tasks", params={"limit": 2})
+    while True:
+        assert r.status_code == 200
+        seen.extend(t["id"] for t in r.json())
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        r = client.get("/api/tasks", params={"limit": 2, "cursor": cursor})
+
+    assert ids <= set(seen)
+    assert len(seen) == len(set(seen))
+    assert client.get("/api/tasks", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_tag_filters_use_exact_tags_with_and_or(client: TestClient) -> None:
+    r = client.post(
+        "/api/tasks/bulk",
+        json={"items": [
+            {"title": "t1", "tags": ["red-x", "blue-x"]},
+            {"title": "t2", "tags": ["red-x"]},
+            {"title": "t3", "tags": ["red-xl"]},
+        ]},
+    )
+    t1, t2, t3 = (item["id"] for item in r.json()["results"])
+
+    def ids(**params) -> set[int]:
+        return {t["id"] for t in client.get("/api/tasks", params={"limit": 1000, **params}).json()}
+
+    assert ids(tag="red-x") >= {t1, t2} and t3 not in ids(tag="red-x")
+    assert {t1} == ids(tags="red-x,blue-x") & {t1, t2, t3}
+    assert {t1, t2, t3} == ids(tags="blue-x,red-xl,red-x", tag_mode="any") & {t1, t2, t3}
+
+    client.patch(f"/api/tasks/{t2}", json={"tags": ["blue-x"]})
+    assert t2 not in ids(tag="red-x")
+    assert t2 in ids(tag="blue-x")
+
+
+def test_keyword_search_is_ranked_and_prefix_matched(client: TestClient) -> None:
+    r = client.post(
+        "/api/tasks/bulk",
+        json={"items": [
+            {"title": "zebrafish tank", "description": "clean the zebrafish zebrafish tank"},
+            {"title": "groceries", "description": "zebrafish food"},
+            {"title": "unrelated"},
+        ]},
+    )
+    strong, weak, other = (item["id"] for item in r.json()["results"])
+
+    ids = [t["id"] for t in client.get("/api/tasks", params={"search": "zebraf"}).json()]
+    assert ids[:2] == [strong, weak]
+    assert other not in ids
+
+    client.patch(f"/api/tasks/{weak}", json={"description": "bread"})
+    ids = [t["id"] for t in client.get("/api/tasks", params={"search": "zebrafish"}).json()]
+    assert weak not in ids
+
+
+def test_writes_use_returning_without_extra_selects() -> None:
+    if not engine.dialect.update_returning:
+        return
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+        statements.append(statement.lstrip())
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with SessionLocal() as db:
+            task = task_service.create_task(db, TaskCreate(title="Returning", tags=["a"]))
+            assert task.id and task.created_at and task.updated_at
+            created = list(statements)
+            statements.clear()
+
+            updated = task_service.update_task(db, task.id, TaskUpdate(status="completed"))
+            assert updated is not None and updated.status.value == "completed" and updated.title == "Returning"
+            patched = list(statements)
+            assert task_service.update_task(db, 10**9, TaskUpdate(title="missing")) is None
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert not any(s.startswith("SELECT") for s in created + patched), created + patched
+    assert [s.split()[0] for s in patched] == ["UPDATE"]
+    assert "RETURNING" in patched[0]
+
+
+def test_async_crud_routes_round_trip(client: TestClient) -> None:
+    async_app = FastAPI()
+    async_app.include_router(task_router, prefix="/api")
+    async_app.include_router(async_crud_router, prefix="/api")
+
+    with TestClient(async_app) as async_client:
+        r = async_client.post("/api/tasks", json={"title": "Async task", "tags": ["async"]})
+        assert r.status_code == 201
+        task_id = r.json()["id"]
+
+        assert async_client.get(f"/api/tasks/{task_id}").json()["title"] == "Async task"
+        listed = async_client.get("/api/tasks", params={"tag": "async", "limit": 100}).json()
+        assert task_id in [t["id"] for t in listed]
+
+        r = async_client.patch(f"/api/tasks/{task_id}", json={"status": "completed"})
+        assert r.status_code == 200 and r.json()["status"] == "completed"
+        # Still visible to the sync stack: both share one database.
+        assert client.get(f"/api/tasks/{task_id}").json()["status"] == "completed"
+
+        assert async_client.delete(f"/api/tasks/{task_id}").status_code == 204
+        assert async_client.get(f"/api/tasks/{task_id}").status_code == 404
+        assert async_client.get("/api/tasks/export").status_code == 200
+
+
+def test_search_orders_by_relevance_then_id(client: TestClient) -> None:
+    with SessionLocal() as db:
+        params = TaskQueryParams(search="report")
+        sql = str(task_service.build_list_query(db, params).compile(dialect=db.get_bind().dialect))
+    order_by = sql.rsplit("ORDER BY", 1)[1]
+    assert order_by.strip().startswith(("anon_1.rank", "ts_rank")), order_by
+    assert order_by.index("tasks.id") > 0
+
+    r = client.post("/api/tasks/bulk", json={"items": [{"title": "report"} for _ in range(3)]})
+    ids = [item["id"] for item in r.json()["results"]]
+    # Equal relevance: ties come back in id order.
+    assert [t["id"] for t in client.get("/api/tasks", params={"search": "report"}).json()] == ids